@@ -4,6 +4,7 @@ DataSoph AI - MINIMAL Clean Implementation
 """
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Optional
@@ -28,7 +29,7 @@ class ChatResponse(BaseModel):
     timestamp: str
 
 # FastAPI setup
-app = FastAPI(title="DataSoph AI - Minimal")
+app = FastAPI(title="DataSoph AI - Minimal", default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 # Static files
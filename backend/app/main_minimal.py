@@ -2,12 +2,14 @@
 DataSoph AI - MINIMAL Clean Implementation
 90% code reduction while keeping ALL features
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional
 import os
+import shutil
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -15,7 +17,7 @@ import pandas as pd
 
 # Import our 3 core services
 from app.services.core_ai import ai
-from app.services.core_data import data  
+from app.services.core_data import data, get_figure
 from app.services.core_ml import ml
 
 # Simple models
@@ -29,17 +31,51 @@ class ChatResponse(BaseModel):
     timestamp: str
 
 # FastAPI setup
-app = FastAPI(title="DataSoph AI - Minimal")
+app = FastAPI(title="DataSoph AI - Minimal", default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-# Static files
+# Upload storage (figures are served from per-process memory, see /figures/{key}.png)
 os.makedirs("uploads", exist_ok=True)
-os.makedirs("figures", exist_ok=True)
-app.mount("/static/figures", StaticFiles(directory="figures"), name="figures")
 
-# Global file storage (simple)
+# Global file storage (simple) - metadata and analysis only, DataFrames are
+# re-read from disk on demand so worker memory stays flat across uploads
 uploaded_files = {}
 
+# Copy buffer for persisting uploads
+UPLOAD_COPY_BUFSIZE = 1 << 20
+
+def _write_upload(src, file_path: str) -> None:
+    """Persist an upload's spooled file - zero-copy sendfile once it has rolled to disk"""
+    src.seek(0)
+    with open(file_path, "wb") as out:
+        # Only touch fileno() after rollover; on an in-memory spool it would force one
+        if hasattr(os, "sendfile") and getattr(src, "_rolled", False):
+            in_fd, out_fd = src.fileno(), out.fileno()
+            size = os.fstat(in_fd).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        else:
+            shutil.copyfileobj(src, out, UPLOAD_COPY_BUFSIZE)
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this ETag (weak or strong)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+def _load_df(file_info: dict) -> Optional[pd.DataFrame]:
+    """Reload an uploaded data file, preferring the parquet cache"""
+    parquet_path = file_info.get('cached_parquet_path')
+    if parquet_path:
+        return pd.read_parquet(parquet_path, memory_map=True)
+    return data.load_file(file_info['file_path'])
+
 @app.post("/api/v1/ai/chat")
 async def chat(request: ChatRequest):
     """Simple chat endpoint"""
@@ -54,12 +90,12 @@ async def chat(request: ChatRequest):
             
             if file_type == 'data':
                 # Data file context
-                df = file_info.get('dataframe')
-                if df is not None:
+                shape = file_info.get('shape')
+                if shape is not None:
                     analysis = file_info.get('analysis', {})
                     context = f"""DATASET CONTEXT:
-You have access to a dataset with {df.shape[0]} rows and {df.shape[1]} columns.
-Columns: {', '.join(df.columns.tolist())}
+You have access to a dataset with {shape[0]} rows and {shape[1]} columns.
+Columns: {', '.join(file_info['columns'])}
 Analysis: {analysis}
 
 USER QUESTION: {message}
@@ -114,12 +150,12 @@ INSTRUCTIONS:
             file_type = file_info.get('file_type', 'unknown')
             
             if file_type == 'data':
-                df = file_info.get('dataframe')
-                if df is not None:
+                shape = file_info.get('shape')
+                if shape is not None:
                     analysis = file_info.get('analysis', {})
                     context = f"""RECENT DATASET CONTEXT:
-You have access to a recently uploaded dataset with {df.shape[0]} rows and {df.shape[1]} columns.
-Columns: {', '.join(df.columns.tolist())}
+You have access to a recently uploaded dataset with {shape[0]} rows and {shape[1]} columns.
+Columns: {', '.join(file_info['columns'])}
 
 USER QUESTION: {message}
 
@@ -174,28 +210,29 @@ async def upload_file(file: UploadFile = File(...)):
         file_id = str(uuid.uuid4())
         file_path = f"uploads/{file_id}_{file.filename}"
         
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await run_in_threadpool(_write_upload, file.file, file_path)
         
         # Universal file processing with OCR
         from app.universal_ocr import universal_ocr
         
-        # Try data file first (CSV, Excel)
-        df = data.load_file(file_path)
+        # Try data file first (CSV, Excel) unless magic bytes say it's a document/image
+        df = None if data.is_non_tabular(file_path) else data.load_file(file_path)
         
         if df is not None:
             # Data file processing
             print(f"📊 DEBUG - Loaded data: shape={df.shape}, columns={df.columns.tolist()}")
             
-            analysis = data.analyze(df)
+            # Stats only - the correlation chart is rendered on demand
+            analysis = data.analyze_stats(df)
             
             uploaded_files[file_id] = {
                 'filename': file.filename,
                 'file_path': file_path,
                 'file_type': 'data',
-                'dataframe': df,
+                'cached_parquet_path': data.cache_parquet(df, f"uploads/{file_id}.parquet"),
                 'analysis': analysis,
+                'shape': df.shape,
+                'columns': df.columns.tolist(),
                 'upload_time': datetime.now().isoformat(),
                 'text_content': None
             }
@@ -214,46 +251,47 @@ async def upload_file(file: UploadFile = File(...)):
             # Try universal OCR for documents/images
             if universal_ocr.is_supported(file_path):
                 print(f"📄 DEBUG - Processing with universal OCR: {file.filename}")
-                ocr_result = universal_ocr.extract_text(file_path)
+                ocr_result = await universal_ocr.extract_text_async(file_path)
                 
                 if ocr_result['success']:
                     extracted_text = ocr_result['text']
                     method = ocr_result['method']
                     content_type = universal_ocr.get_content_type(file_path, extracted_text)
                     
-                    print(f"📝 DEBUG - OCR extracted {len(extracted_text)} characters using {method}")
+                    # Compute text stats once; count(" ") avoids building a word list
+                    text_len = len(extracted_text)
+                    word_count = extracted_text.count(" ") + 1 if text_len else 0
+                    preview = extracted_text[:200] + "..." if text_len > 200 else extracted_text
+                    
+                    print(f"📝 DEBUG - OCR extracted {text_len} characters using {method}")
                     
                     uploaded_files[file_id] = {
                         'filename': file.filename,
                         'file_path': file_path,
                         'file_type': 'document',
-                        'dataframe': None,
                         'analysis': None,
                         'upload_time': datetime.now().isoformat(),
                         'text_content': {
                             'text': extracted_text,
                             'method': method,
                             'content_type': content_type,
-                            'word_count': len(extracted_text.split()),
-                            'char_count': len(extracted_text)
+                            'word_count': word_count,
+                            'char_count': text_len
                         }
                     }
                     
                     print(f"💾 DEBUG - Stored document: file_id={file_id}")
                     
-                    word_count = len(extracted_text.split())
-                    preview = extracted_text[:200] + "..." if len(extracted_text) > 200 else extracted_text
-                    
                     return {
                         "file_id": file_id,
                         "filename": file.filename,
                         "file_type": "document",
-                        "message": f"✅ Document processed! Extracted {len(extracted_text)} characters, {word_count} words from {content_type}. Ask me about the content!",
+                        "message": f"✅ Document processed! Extracted {text_len} characters, {word_count} words from {content_type}. Ask me about the content!",
                         "content": {
                             "method": method,
                             "content_type": content_type,
                             "word_count": word_count,
-                            "char_count": len(extracted_text),
+                            "char_count": text_len,
                             "preview": preview
                         }
                     }
@@ -273,13 +311,51 @@ async def auto_ml_endpoint(file_id: str, target_column: str):
         if file_id not in uploaded_files:
             raise HTTPException(status_code=404, detail="File not found")
         
-        df = uploaded_files[file_id]['dataframe']
+        df = _load_df(uploaded_files[file_id])
         result = ml.auto_ml(df, target_column)
         
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/charts/{file_id}/correlation")
+async def correlation_chart(file_id: str, request: Request):
+    """Correlation heatmap for an uploaded data file, rendered on first request"""
+    if file_id not in uploaded_files or uploaded_files[file_id].get('file_type') != 'data':
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    file_info = uploaded_files[file_id]
+    chart_key = file_info.get('chart')
+    # The key is the PNG's content hash, so a matching tag needs neither cache nor render
+    if chart_key and _etag_matches(request, f'"{chart_key}"'):
+        return Response(status_code=304, headers={"ETag": f'"{chart_key}"'})
+    png = get_figure(chart_key) if chart_key else None
+    if png is None:
+        # Reading the file and drawing the heatmap take seconds - keep them off the event loop
+        chart_key = await run_in_threadpool(lambda: data.render_correlation(_load_df(file_info)))
+        if not chart_key:
+            raise HTTPException(status_code=404, detail="Not enough numeric columns for a correlation chart")
+        file_info['chart'] = chart_key
+        png = get_figure(chart_key)
+    
+    return Response(content=png, media_type="image/png", headers={"ETag": f'"{chart_key}"'})
+
+@app.get("/figures/{key}.png")
+async def figure(key: str, request: Request):
+    """
+    Content-addressed figure - the URL changes whenever the image does
+    Served from this process's FIG_CACHE: single-worker only. Under several
+    uvicorn workers use /api/v1/charts/{file_id}/correlation, which re-renders
+    on a cache miss.
+    """
+    headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    png = get_figure(key)
+    if png is None:
+        raise HTTPException(status_code=404, detail="Figure not found")
+    return Response(content=png, media_type="image/png", headers=headers)
+
 @app.get("/")
 async def root():
     return {"message": "DataSoph AI - Minimal & Clean! 🚀"}
@@ -17,77 +17,56 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Expert AI system prompt (Turkish + English), kept short since it is sent with every request
+SYSTEM_PROMPT_TR_EN = """Sen DataSoph AI'sın - 20+ yıllık deneyimli, dünya çapında uzman bir veri bilimcisi ve öğretmensin (istatistik, makine öğrenmesi, veri analizi, iş zekası, Python/R/SQL, veri mühendisliği).
+
+DİL: Kullanıcının dilinde yanıt ver - Türkçe soruya Türkçe, İngilizce soruya İngilizce.
+
+YANIT TARZI:
+- Uzman derinliğinde, spesifik ve uygulanabilir tavsiyeler ver
+- Uygun olduğunda kod örnekleri, en iyi uygulamalar ve alternatif yaklaşımlar sun
+- Karmaşık kavramları basitten karmaşığa, adım adım açıkla; öğrencinin seviyesine uyarla
+- İş bağlamını ve pratik kısıtları dikkate al; samimi ama profesyonel ol
+
+ASLA: genel/robotik veya yüzeysel cevap verme, "yardım edemem" deme (alternatif sun), kullanıcının dil tercihini görmezden gelme."""
+
+# Providers that need an explicit marker to cache the system prompt prefix
+PROMPT_CACHE_PROVIDERS = ("anthropic/",)
+
+def build_system_message(model: str) -> Dict[str, Any]:
+    """System message for model, with a prompt-cache marker where supported"""
+    if model.startswith(PROMPT_CACHE_PROVIDERS):
+        return {
+            "role": "system",
+            "content": [{"type": "text", "text": SYSTEM_PROMPT_TR_EN, "cache_control": {"type": "ephemeral"}}]
+        }
+    return {"role": "system", "content": SYSTEM_PROMPT_TR_EN}
+
+# One shared client per process so the HTTP connection pool is reused across chats
+_api_key = os.getenv("OPENROUTER_API_KEY")
+_client = create_openrouter_client(_api_key) if _api_key else None
+
 class CoreAI:
     def __init__(self):
         # Pure OpenRouter setup - NO OpenAI
-        self.api_key = os.getenv("OPENROUTER_API_KEY")
+        self.api_key = _api_key
         if not self.api_key:
             logger.warning("OPENROUTER_API_KEY not found in environment variables")
             
-        self.client = create_openrouter_client(self.api_key) if self.api_key else None
+        self.client = _client
         self.model = "openai/gpt-3.5-turbo"
+        self._system_message = build_system_message(self.model)
     
     async def chat(self, message: str, user_id: str = "user") -> str:
         """Expert AI chat with multilingual support and intelligent responses"""
         if not self.client or not self.api_key:
             return "AI service not available - OpenRouter API key not configured"
         
-        # Enhanced Expert AI System Prompt with Perfect Turkish Support
-        system_prompt = """Sen DataSoph AI'sın - 20+ yıllık deneyime sahip dünya çapında uzman bir veri bilimcisin. İstatistik, makine öğrenmesi, veri analizi, iş zekası ve en son AI tekniklerinde derin bilgiye sahipsin.
-
-KRİTİK DİL KURALI:
-- Kullanıcının yazdığı dille AYNI DİLDE yanıt ver
-- Türkçe soru gelirse Türkçe yanıtla
-- İngilizce soru gelirse İngilizce yanıtla
-- Her iki dilde de uzmanlık seviyeni koru
-
-UZMANLIK ALANLARIN:
-- İleri düzey istatistiksel analiz ve makine öğrenmesi
-- Veri görselleştirme ve iş zekası
-- Programlama (Python, R, SQL) ve veri mühendisliği
-- İş stratejisi ve veri odaklı karar verme
-- Araştırma metodolojisi ve bilimsel titizlik
-- Eğitim ve öğretim (özellikle Python, veri analizi)
-
-İLETİŞİM TARZI:
-- Akıllı, anlayışlı ve gerçekten yardımcı ol
-- Spesifik, uygulanabilir tavsiyeler ver
-- Uygun teknik terminoloji kullan
-- Veri bilimi kavramlarına derin anlayış göster
-- Pratik, gerçek dünya çözümleri sun
-- Samimi ama profesyonel ol
-
-YANIT REHBERLERİ:
-- Soruları uzman seviyesinde derinlikte yanıtla
-- Uygun olduğunda kod örnekleri ver
-- En iyi uygulamaları ve metodolojileri öner
-- Karmaşık kavramları açık şekilde açıkla
-- Uygun olduğunda birden fazla yaklaşım sun
-- İş bağlamını ve pratik kısıtlamaları dikkate al
-- Öğretmen gibi davran - sabırla öğret ve açıkla
-
-ÖZELLİKLE:
-- Python öğretimi için adım adım rehberlik ver
-- Kod örnekleri ile açıkla
-- Basit terimlerle başla, karmaşığa ilerle
-- Pratik uygulamalarla destekle
-- Öğrenci seviyesine göre uyarla
-
-ASLA:
-- Genel veya robotik cevaplar verme
-- "Yardım edemem" deme, alternatifler sun
-- Kullanıcının dil tercihini görmezden gelme
-- Yüzeysel veya faydasız cevaplar verme
-- Temel veri bilimi konularında şaşkın davranma
-- Hata mesajları verme, her zaman yardım et
-
-Sen kullanıcının uzman veri bilimi danışmanı ve öğretmenisin."""
-
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.acreate(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    self._system_message,
                     {"role": "user", "content": message}
                 ],
                 max_tokens=3000,  # Increased for detailed teaching responses
@@ -7,19 +7,62 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Fix macOS GUI thread issue
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
-import os
+import io
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Leading bytes of binary formats that can never be loaded as a DataFrame
+NON_TABULAR_MAGIC = (
+    b'%PDF',                   # PDF
+    b'\x89PNG\r\n\x1a\n',      # PNG
+    b'\xff\xd8\xff',           # JPEG
+    b'GIF87a', b'GIF89a',      # GIF
+    b'II*\x00', b'MM\x00*',    # TIFF
+)
+ZIP_MAGIC = b'PK\x03\x04'  # xlsx is a zip, but so are docx/pptx
+
+# Stats reported per numeric column in analysis['summary']
+SUMMARY_STATS = ['count', 'mean', 'std', 'min', 'max']
+
+# Above this many numeric columns the heatmap is drawn without cell labels
+MAX_ANNOTATED_COLS = 15
+
+# Rendered PNGs keyed by content hash (LRU, per process) - no disk I/O
+FIG_CACHE: "OrderedDict[str, bytes]" = OrderedDict()
+FIG_CACHE_MAX = 64
+# Charts render in threadpool workers, so LRU reorder/evict must not interleave
+_FIG_LOCK = threading.Lock()
+
+def get_figure(key: str) -> Optional[bytes]:
+    """Look up a rendered figure by its hash key"""
+    with _FIG_LOCK:
+        png = FIG_CACHE.get(key)
+        if png is not None:
+            FIG_CACHE.move_to_end(key)
+    return png
+
 class CoreData:
     def __init__(self):
-        self.figures_dir = "figures"
-        os.makedirs(self.figures_dir, exist_ok=True)
         plt.style.use('default')
     
+    def is_non_tabular(self, file_path: str) -> bool:
+        """Sniff magic bytes - True when the file is clearly a document/image, not data"""
+        try:
+            with open(file_path, 'rb') as fh:
+                head = fh.read(8)
+        except OSError:
+            return False
+        if head.startswith(NON_TABULAR_MAGIC):
+            return True
+        return head.startswith(ZIP_MAGIC) and not file_path.endswith('.xlsx')
+    
     def load_file(self, file_path: str) -> Optional[pd.DataFrame]:
         """Load any common file type"""
         try:
@@ -35,35 +78,83 @@ class CoreData:
             logger.error(f"File load error: {e}")
             return None
     
-    def analyze(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Basic analysis - no complexity"""
+    def cache_parquet(self, df: pd.DataFrame, parquet_path: str) -> Optional[str]:
+        """Write a columnar copy of df for fast reloads - returns path or None"""
+        if not all(isinstance(col, str) for col in df.columns):
+            # parquet stores names as strings, so 0 would come back as '0'
+            logger.warning("Parquet cache skipped: non-string column names")
+            return None
+        try:
+            df.to_parquet(parquet_path, index=False)
+            return parquet_path
+        except Exception as e:
+            # e.g. pyarrow missing or mixed-type columns - callers fall back to the original file
+            logger.warning(f"Parquet cache skipped: {e}")
+            return None
+    
+    def _summarize(self, num: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-column summary stats in one vectorized pass, NaN -> None"""
+        if num.shape[1] == 0:
+            return {}
+        stats = num.agg(SUMMARY_STATS).to_numpy(dtype=float)
+        stats = np.where(np.isnan(stats), None, stats).T.tolist()
+        return {col: dict(zip(SUMMARY_STATS, row)) for col, row in zip(num.columns, stats)}
+    
+    def analyze_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Cheap JSON-serializable stats - safe for the upload hot path"""
         try:
-            # Simple stats - JSON serializable
-            analysis = {
+            numeric_cols = df.select_dtypes(include=[np.number]).columns
+            
+            return {
                 'shape': df.shape,
                 'columns': df.columns.tolist(),
                 'dtypes': {col: str(dtype) for col, dtype in df.dtypes.to_dict().items()},
                 'missing': {col: int(count) for col, count in df.isnull().sum().to_dict().items()},
-                'summary': {col: {k: float(v) if pd.notna(v) else None for k, v in stats.items()} 
-                           for col, stats in df.describe().to_dict().items()} if len(df.select_dtypes(include=[np.number]).columns) > 0 else {}
+                'summary': self._summarize(df[numeric_cols])
             }
-            
-            # Create simple visualization
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            if len(numeric_cols) > 1:
-                plt.figure(figsize=(10, 6))
-                sns.heatmap(df[numeric_cols].corr(), annot=True, cmap='RdBu_r')
-                plt.title('Correlation Matrix')
-                plt.tight_layout()
-                chart_path = f"{self.figures_dir}/correlation.png"
-                plt.savefig(chart_path)
-                plt.close()
-                analysis['chart'] = chart_path
-            
-            return analysis
         except Exception as e:
             logger.error(f"Analysis error: {e}")
             return {'error': str(e)}
+    
+    def render_correlation(self, df: pd.DataFrame) -> Optional[str]:
+        """Render correlation heatmap to PNG in FIG_CACHE (expensive) - returns key or None
+        Uses a standalone Figure rather than pyplot's global current-figure state,
+        so it is safe to call from several threads at once.
+        """
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if len(numeric_cols) < 2:
+            return None
+        
+        try:
+            fig = Figure(figsize=(10, 6))
+            ax = fig.subplots()
+            # Cell annotations are unreadable and slow to draw on large matrices
+            sns.heatmap(df[numeric_cols].corr(), annot=len(numeric_cols) <= MAX_ANNOTATED_COLS,
+                        cmap='RdBu_r', ax=ax)
+            ax.set_title('Correlation Matrix')
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', dpi=90, bbox_inches='tight')
+        except Exception as e:
+            logger.error(f"Chart render error: {e}")
+            return None
+        
+        # Identical charts share one key, so duplicate uploads dedupe automatically
+        key = hashlib.blake2b(buf.getbuffer(), digest_size=12).hexdigest()
+        with _FIG_LOCK:
+            FIG_CACHE[key] = buf.getvalue()
+            FIG_CACHE.move_to_end(key)
+            while len(FIG_CACHE) > FIG_CACHE_MAX:
+                FIG_CACHE.popitem(last=False)
+        return key
+    
+    def analyze(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Stats plus correlation chart"""
+        analysis = self.analyze_stats(df)
+        if 'error' not in analysis:
+            chart_key = self.render_correlation(df)
+            if chart_key:
+                analysis['chart'] = f"/figures/{chart_key}.png"
+        return analysis
 
 # Global instance
 data = CoreData()
@@ -2,10 +2,13 @@
 Core ML Service - Minimal machine learning
 Replaces: expert_data_scientist.py + automl_pipeline.py + model_explainer.py
 """
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor,
+    HistGradientBoostingClassifier, HistGradientBoostingRegressor
+)
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, r2_score
-from sklearn.preprocessing import LabelEncoder
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional
@@ -13,6 +16,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Above this many training rows, histogram gradient boosting replaces random forest
+LARGE_DATA_ROWS = 50_000
+
 class CoreML:
     def __init__(self):
         self.model = None
@@ -25,23 +31,30 @@ class CoreML:
             X = df.drop(columns=[target_col])
             y = df[target_col]
             
-            # Handle categorical variables simply
-            for col in X.select_dtypes(include=['object']).columns:
-                X[col] = LabelEncoder().fit_transform(X[col].astype(str))
+            # Handle categorical variables simply (hashed factorization, missing -> -1)
+            for col in X.select_dtypes(include=['object', 'category']).columns:
+                X[col] = pd.Categorical(X[col]).codes
             
             # Detect task type
             if y.dtype == 'object' or y.nunique() < 20:
                 self.task_type = 'classification'
                 if y.dtype == 'object':
-                    y = LabelEncoder().fit_transform(y)
-                self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+                    y = pd.Categorical(y).codes
             else:
                 self.task_type = 'regression'
-                self.model = RandomForestRegressor(n_estimators=100, random_state=42)
             
             # Train/test split
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
             
+            # Pick model - histogram boosting is much faster on large data
+            large = len(X_train) > LARGE_DATA_ROWS
+            if self.task_type == 'classification':
+                self.model = (HistGradientBoostingClassifier(random_state=42) if large
+                              else RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1))
+            else:
+                self.model = (HistGradientBoostingRegressor(random_state=42) if large
+                              else RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1))
+            
             # Train
             self.model.fit(X_train, y_train)
             
@@ -54,8 +67,14 @@ class CoreML:
                 score = r2_score(y_test, y_pred)
                 metric = 'r2_score'
             
-            # Feature importance
-            importance = dict(zip(X.columns, self.model.feature_importances_))
+            # Feature importance (HistGradientBoosting has no native importances)
+            if hasattr(self.model, 'feature_importances_'):
+                importances = self.model.feature_importances_
+            else:
+                importances = permutation_importance(
+                    self.model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=-1
+                ).importances_mean
+            importance = dict(zip(X.columns, importances))
             top_features = sorted(importance.items(), key=lambda x: x[1], reverse=True)[:5]
             
             return {
@@ -8,36 +8,47 @@ import seaborn as sns
 import io
 import base64
 import logging
-import sys
+import contextlib
+import threading
 from typing import Dict, Any
 
+# Numba is optional - lets user snippets JIT numeric loops with @njit
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# redirect_stdout swaps the process-wide sys.stdout and safe_globals is shared,
+# so concurrent executions would capture each other's output - run one at a time
+_EXEC_LOCK = threading.Lock()
+
 class SimpleCodeExecutor:
     def __init__(self):
         self.safe_globals = {
             'pd': pd, 'np': np, 'plt': plt, 'sns': sns,
             '__builtins__': {'len': len, 'sum': sum, 'max': max, 'min': min, 'round': round}
         }
+        if NUMBA_AVAILABLE:
+            self.safe_globals.update({'numba': numba, 'njit': numba.njit})
     
     def execute(self, code: str, df: pd.DataFrame = None) -> Dict[str, Any]:
         """Execute simple pandas/numpy code"""
         try:
-            # Add dataframe to context
-            if df is not None:
-                self.safe_globals['df'] = df
-                self.safe_globals['data'] = df
-            
-            # Capture output
-            old_stdout = sys.stdout
-            sys.stdout = io.StringIO()
-            
-            # Execute code
-            exec(code, self.safe_globals)
+            buf = io.StringIO()
+            with _EXEC_LOCK:
+                # Add dataframe to context
+                if df is not None:
+                    self.safe_globals['df'] = df
+                    self.safe_globals['data'] = df
+                
+                # Capture output (stdout is restored even if the code raises)
+                with contextlib.redirect_stdout(buf):
+                    exec(code, self.safe_globals)
             
-            # Get output
-            output = sys.stdout.getvalue()
-            sys.stdout = old_stdout
+            output = buf.getvalue()
             
             return {'success': True, 'output': output}
             
@@ -0,0 +1,34 @@
+"""
+Tuning and helpers shared by the OCR extractors (services.ocr_service and universal_ocr)
+"""
+import multiprocessing
+from typing import List, Tuple
+
+# adaptiveThreshold neighbourhood (odd, in pixels) and offset subtracted from the local mean
+ADAPTIVE_BLOCK_SIZE = 31
+ADAPTIVE_C = 10
+
+# PDFs with fewer pages are parsed in-process; process startup would cost more than it saves
+PARALLEL_PDF_MIN_PAGES = 8
+
+
+def mp_context():
+    """
+    Start method for the OCR process pools
+    Never fork: the pools are started from threads (extract_many, run_in_executor),
+    and a child forked while another thread holds a lock (_FITZ_LOCK, the cache or
+    import locks) would inherit it locked and block forever.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split range(page_count) into at most `parts` contiguous (start, stop) runs of near-equal size"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + size + (i < extra)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
@@ -5,14 +5,52 @@ Replaces all OpenAI functionality with direct OpenRouter API calls using request
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import httpx
+import importlib.util
+import inspect
 import json
+import orjson
+import random
 import time
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Iterator, Optional, Union
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Process-wide async connection pool shared by every client - HTTP/2 multiplexes
+# concurrent completions over one connection when the h2 package is installed
+_async_client: Optional[httpx.AsyncClient] = None
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Shared pooled AsyncClient, (re)created on first use"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=60,
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_keepalive_connections=50)
+        )
+    return _async_client
+
+# Random seconds added to each retry backoff so clients rate-limited together
+# don't all retry in the same instant
+RETRY_BACKOFF_JITTER = 0.3
+
+class _JitteredRetry(Retry):
+    """Retry with backoff jitter for urllib3 1.x, whose Retry has no backoff_jitter"""
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, RETRY_BACKOFF_JITTER) if backoff else backoff
+
+def _make_retry(**kwargs) -> Retry:
+    """Retry policy with jitter - native on urllib3 2.x, via get_backoff_time on 1.x"""
+    if "backoff_jitter" in inspect.signature(Retry.__init__).parameters:
+        return Retry(backoff_jitter=RETRY_BACKOFF_JITTER, **kwargs)
+    return _JitteredRetry(**kwargs)
+
 @dataclass
 class OpenRouterMessage:
     role: str
@@ -49,27 +87,44 @@ class OpenRouterClient:
         if not self.api_key:
             logger.warning("OpenRouter API key not found. Please set OPENROUTER_API_KEY environment variable.")
             
+        self.headers: Dict[str, str] = {}
         self.session = requests.Session()
         self._setup_session()
         
     def _setup_session(self):
-        """Setup requests session with default headers"""
+        """Setup requests session with default headers, keepalive pool and retries"""
+        # Transient rate limits / gateway errors are retried with exponential
+        # backoff plus jitter (honouring Retry-After); the pool keeps TLS connections warm.
+        # Read errors are never retried: the POST has reached the server, so a retry
+        # could re-run (and re-bill) a completion after waiting out another timeout.
+        retry = _make_retry(
+            total=5,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+        self.session.mount("https://", adapter)
+        
         if self.api_key:
-            self.session.headers.update({
+            self.headers = {
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
                 "HTTP-Referer": "https://datasoph.ai",  # Optional: Your site URL
                 "X-Title": "DataSoph AI"  # Optional: Your app name
-            })
+            }
+            self.session.headers.update(self.headers)
     
     def _make_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP request to OpenRouter API"""
         url = f"{self.base_url}/{endpoint}"
         
         try:
-            response = self.session.post(url, json=data, timeout=60)
+            response = self.session.post(url, data=orjson.dumps(data), timeout=60)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"OpenRouter API request failed: {e}")
@@ -78,6 +133,64 @@ class OpenRouterClient:
             logger.error(f"Failed to parse OpenRouter response: {e}")
             raise Exception(f"Invalid response from OpenRouter: {str(e)}")
     
+    async def _make_request_async(self, endpoint: str, data: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Make non-blocking HTTP request to OpenRouter API"""
+        url = f"{self.base_url}/{endpoint}"
+        
+        try:
+            response = await _get_async_client().post(url, content=orjson.dumps(data), headers=self.headers, timeout=timeout or 60)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+            
+        except httpx.HTTPError as e:
+            logger.error(f"OpenRouter API request failed: {e}")
+            raise Exception(f"OpenRouter API error: {str(e)}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse OpenRouter response: {e}")
+            raise Exception(f"Invalid response from OpenRouter: {str(e)}")
+    
+    def _build_request_data(self, model: str, messages: Optional[List[Dict[str, str]]], **params) -> Dict[str, Any]:
+        """Prepare chat completion request body, dropping None values"""
+        if not self.api_key:
+            raise Exception("OpenRouter API key not configured")
+        
+        request_data = {"model": model, "messages": messages or [], **params}
+        return {k: v for k, v in request_data.items() if v is not None}
+    
+    def _parse_response(self, response_data: Dict[str, Any], model: str) -> OpenRouterResponse:
+        """Parse raw chat completion JSON into structured format"""
+        choices = []
+        for choice_data in response_data.get("choices", []):
+            message_data = choice_data.get("message", {})
+            message = OpenRouterMessage(
+                role=message_data.get("role", "assistant"),
+                content=message_data.get("content", "")
+            )
+            
+            choice = OpenRouterChoice(
+                index=choice_data.get("index", 0),
+                message=message,
+                finish_reason=choice_data.get("finish_reason", "stop")
+            )
+            choices.append(choice)
+        
+        # Parse usage information
+        usage_data = response_data.get("usage", {})
+        usage = OpenRouterUsage(
+            prompt_tokens=usage_data.get("prompt_tokens", 0),
+            completion_tokens=usage_data.get("completion_tokens", 0),
+            total_tokens=usage_data.get("total_tokens", 0)
+        )
+        
+        return OpenRouterResponse(
+            id=response_data.get("id", ""),
+            object=response_data.get("object", "chat.completion"),
+            created=response_data.get("created", int(time.time())),
+            model=response_data.get("model", model),
+            choices=choices,
+            usage=usage
+        )
+    
     def chat_completions_create(
         self,
         model: str = "anthropic/claude-3.5-sonnet",
@@ -107,68 +220,118 @@ class OpenRouterClient:
         Returns:
             OpenRouterResponse object with choices and usage information
         """
-        if not self.api_key:
-            raise Exception("OpenRouter API key not configured")
-            
-        if messages is None:
-            messages = []
-            
-        # Prepare request data
-        request_data = {
-            "model": model,
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "top_p": top_p,
-            "frequency_penalty": frequency_penalty,
-            "presence_penalty": presence_penalty,
-            "stream": stream,
+        request_data = self._build_request_data(
+            model, messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stream=stream,
             **kwargs
-        }
-        
-        # Remove None values
-        request_data = {k: v for k, v in request_data.items() if v is not None}
+        )
         
         logger.info(f"Making OpenRouter request to model: {model}")
         
         try:
             response_data = self._make_request("chat/completions", request_data)
+            openrouter_response = self._parse_response(response_data, model)
             
-            # Parse response into structured format
-            choices = []
-            for choice_data in response_data.get("choices", []):
-                message_data = choice_data.get("message", {})
-                message = OpenRouterMessage(
-                    role=message_data.get("role", "assistant"),
-                    content=message_data.get("content", "")
-                )
-                
-                choice = OpenRouterChoice(
-                    index=choice_data.get("index", 0),
-                    message=message,
-                    finish_reason=choice_data.get("finish_reason", "stop")
-                )
-                choices.append(choice)
+            logger.info(f"OpenRouter request completed. Tokens used: {openrouter_response.usage.total_tokens}")
+            return openrouter_response
             
-            # Parse usage information
-            usage_data = response_data.get("usage", {})
-            usage = OpenRouterUsage(
-                prompt_tokens=usage_data.get("prompt_tokens", 0),
-                completion_tokens=usage_data.get("completion_tokens", 0),
-                total_tokens=usage_data.get("total_tokens", 0)
-            )
+        except Exception as e:
+            logger.error(f"OpenRouter chat completion failed: {e}")
+            raise
+    
+    def chat_completions_stream(
+        self,
+        model: str = "anthropic/claude-3.5-sonnet",
+        messages: List[Dict[str, str]] = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive (SSE)
+        
+        Args:
+            Same as chat_completions_create (stream is always on)
             
-            # Create response object
-            openrouter_response = OpenRouterResponse(
-                id=response_data.get("id", ""),
-                object=response_data.get("object", "chat.completion"),
-                created=response_data.get("created", int(time.time())),
-                model=response_data.get("model", model),
-                choices=choices,
-                usage=usage
-            )
+        Yields:
+            Text fragments of the first choice, in order
+        """
+        request_data = self._build_request_data(
+            model, messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **{**kwargs, "stream": True}
+        )
+        
+        logger.info(f"Making streaming OpenRouter request to model: {model}")
+        
+        try:
+            with self.session.post(f"{self.base_url}/chat/completions", data=orjson.dumps(request_data),
+                                   stream=True, timeout=60) as response:
+                response.raise_for_status()
+                # Raw bytes lines - orjson parses bytes directly, no per-frame decode
+                for line in response.iter_lines():
+                    # Skip keep-alive blanks and SSE comments (": OPENROUTER PROCESSING")
+                    if not line or not line.startswith(b"data: "):
+                        continue
+                    payload = line[len(b"data: "):].strip()
+                    if payload == b"[DONE]":
+                        break
+                    chunk = orjson.loads(payload)
+                    choices = chunk.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+                        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"OpenRouter API request failed: {e}")
+            raise Exception(f"OpenRouter API error: {str(e)}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse OpenRouter stream chunk: {e}")
+            raise Exception(f"Invalid response from OpenRouter: {str(e)}")
+    
+    async def chat_completions_create_async(
+        self,
+        model: str = "anthropic/claude-3.5-sonnet",
+        messages: List[Dict[str, str]] = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> OpenRouterResponse:
+        """
+        Async version of chat_completions_create - awaits the HTTP round-trip
+        instead of blocking the event loop
+        
+        Args:
+            timeout: HTTP timeout in seconds (not sent to the API)
+            Other arguments are the same as chat_completions_create
+        """
+        request_data = self._build_request_data(
+            model, messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            **kwargs
+        )
+        
+        logger.info(f"Making async OpenRouter request to model: {model}")
+        
+        try:
+            response_data = await self._make_request_async("chat/completions", request_data, timeout=timeout)
+            openrouter_response = self._parse_response(response_data, model)
             
-            logger.info(f"OpenRouter request completed. Tokens used: {usage.total_tokens}")
+            logger.info(f"OpenRouter request completed. Tokens used: {openrouter_response.usage.total_tokens}")
             return openrouter_response
             
         except Exception as e:
@@ -184,6 +347,14 @@ class OpenRouterChatCompletions:
     def create(self, **kwargs) -> OpenRouterResponse:
         """Create chat completion - OpenAI SDK compatible interface"""
         return self.client.chat_completions_create(**kwargs)
+    
+    def stream(self, **kwargs) -> Iterator[str]:
+        """Stream chat completion content deltas"""
+        return self.client.chat_completions_stream(**kwargs)
+    
+    async def acreate(self, **kwargs) -> OpenRouterResponse:
+        """Create chat completion without blocking the event loop"""
+        return await self.client.chat_completions_create_async(**kwargs)
 
 class OpenRouterChat:
     """Chat interface compatible with OpenAI SDK style"""
@@ -191,6 +362,9 @@ class OpenRouterChat:
     def __init__(self, client: OpenRouterClient):
         self.completions = OpenRouterChatCompletions(client)
 
+# How long the /models catalog is reused before refetching (seconds)
+MODELS_CACHE_TTL = 300
+
 # Main OpenRouter client class that mimics OpenAI SDK structure
 class OpenRouter:
     """
@@ -201,25 +375,39 @@ class OpenRouter:
     def __init__(self, api_key: Optional[str] = None, base_url: str = "https://openrouter.ai/api/v1"):
         self.client = OpenRouterClient(api_key, base_url)
         self.chat = OpenRouterChat(self.client)
+        self._models: List[Dict[str, Any]] = []
+        self._model_index: Dict[str, Dict[str, Any]] = {}
+        self._models_fetched_at = 0.0
     
     def get_available_models(self) -> List[Dict[str, Any]]:
-        """Get list of available models from OpenRouter"""
+        """Get list of available models from OpenRouter (cached for MODELS_CACHE_TTL seconds)"""
+        if self._models and time.monotonic() - self._models_fetched_at < MODELS_CACHE_TTL:
+            return self._models
+        
         try:
             url = f"{self.client.base_url}/models"
             response = self.client.session.get(url, timeout=30)
             response.raise_for_status()
-            return response.json().get("data", [])
+            models = orjson.loads(response.content).get("data", [])
         except Exception as e:
             logger.error(f"Failed to get available models: {e}")
             return []
+        
+        self._models = models
+        self._model_index = {model.get("id"): model for model in models}
+        self._models_fetched_at = time.monotonic()
+        return models
     
     def get_model_info(self, model_id: str) -> Dict[str, Any]:
         """Get information about a specific model"""
-        models = self.get_available_models()
-        for model in models:
-            if model.get("id") == model_id:
-                return model
-        return {}
+        self.get_available_models()
+        return self._model_index.get(model_id, {})
+    
+    def refresh(self):
+        """Drop the cached model catalog so the next lookup refetches it"""
+        self._models = []
+        self._model_index = {}
+        self._models_fetched_at = 0.0
 
 # Utility functions for easy migration from OpenAI
 def create_openrouter_client(api_key: Optional[str] = None) -> OpenRouter:
@@ -1,17 +1,57 @@
 """
 Simple Response Enhancer - Minimal formatting
 """
-import re
+from typing import List
 
-def enhance_response(text: str) -> str:
-    """Simple text enhancement"""
-    # Convert **bold** to HTML
-    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+def _convert_pairs(text: str, marker: str, tag: str) -> str:
+    """
+    Wrap marker-delimited spans in <tag>, pairing left to right within a line
+    Each closing marker is located with str.find and consumed (no regex
+    backtracking), so the scan is linear even on unclosed markers.
+    """
+    out: List[str] = []
+    width = len(marker)
+    i = run_start = 0
+    
+    while True:
+        j = text.find(marker, i)
+        if j < 0:
+            break
+        line_end = text.find('\n', j)
+        if line_end < 0:
+            line_end = len(text)
+        
+        k = text.find(marker, j + width, line_end)
+        if k >= 0:
+            out.extend((text[run_start:j], f'<{tag}>', text[j + width:k], f'</{tag}>'))
+            i = run_start = k + width
+        else:
+            # Unclosed marker - keep it as literal text
+            i = j + 1
     
-    # Convert *italic* to HTML
-    text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
+    out.append(text[run_start:])
+    return ''.join(out)
+
+def _format_inline(text: str) -> str:
+    """Convert **bold** then *italic* to HTML"""
+    return _convert_pairs(_convert_pairs(text, '**', 'strong'), '*', 'em')
+
+def enhance_response(text: str) -> str:
+    """Simple text enhancement - code blocks are emitted verbatim"""
+    out: List[str] = []
+    i = 0
     
-    # Convert code blocks
-    text = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', text, flags=re.DOTALL)
+    while True:
+        # Convert code blocks
+        j = text.find('```', i)
+        if j < 0:
+            break
+        k = text.find('```', j + 3)
+        if k < 0:
+            break
+        out.append(_format_inline(text[i:j]))
+        out.append(f'<pre><code>{text[j + 3:k]}</code></pre>')
+        i = k + 3
     
-    return text
\ No newline at end of file
+    out.append(_format_inline(text[i:]))
+    return ''.join(out)
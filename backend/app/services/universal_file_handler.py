@@ -2,16 +2,36 @@
 Enhanced File Handler - With OCR support for documents and images
 """
 import pandas as pd
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 
-from .ocr_service import ocr_service
+from .ocr_config import mp_context
+from .ocr_service import mark_pool_worker, ocr_service
 
 logger = logging.getLogger(__name__)
 
+# Read size for streaming files through the cache-key hash
+CACHE_HASH_CHUNK = 1 << 20
+
+# On-disk OCR result cache; OCR_CACHE_DIR='' turns it off
+OCR_CACHE_DIR = os.getenv('OCR_CACHE_DIR', str(Path.home() / '.datasoph_ocr_cache'))
+# Past this total size the least recently used entries are evicted
+OCR_CACHE_MAX_BYTES = int(float(os.getenv('OCR_CACHE_MAX_MB', '256')) * (1 << 20))
+# Entries unused for this long are evicted (0 disables the age cap)
+OCR_CACHE_MAX_AGE = float(os.getenv('OCR_CACHE_MAX_AGE_DAYS', '30')) * 86400
+# The directory is pruned on the first write and then every this many writes
+OCR_CACHE_PRUNE_EVERY = 32
+
 class EnhancedFileHandler:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         # Data formats
         self.data_formats = {'.csv', '.xlsx', '.xls', '.json', '.txt'}
         
@@ -20,9 +40,187 @@ class EnhancedFileHandler:
         
         # All supported formats
         self.supported_formats = self.data_formats | self.ocr_formats
+        
+        # OCR is deterministic and uploads are immutable, so results are cached
+        # on disk by content hash and engine - a re-upload skips extraction entirely.
+        # The directory is created on the first write, not at import.
+        cache_dir = OCR_CACHE_DIR if cache_dir is None else cache_dir
+        self._cache_dir: Optional[Path] = Path(cache_dir).expanduser() if cache_dir else None
+        self._cache_writes = 0
+    
+    def detect_and_process(self, file_path: Union[str, List[str]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Enhanced file processing with OCR support - pass a list to batch image OCR"""
+        if isinstance(file_path, (list, tuple)):
+            return self._detect_and_process_batch(list(file_path))
+        return self._process_file(file_path)
+    
+    async def detect_and_process_many(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Process many files concurrently, one result per path in order
+        Cache lookups run on threads; everything that still needs extracting
+        goes to a process pool since OCR is CPU-bound. With EasyOCR, images stay
+        in this process and are GPU-batched - the model can't be shared with workers.
+        """
+        loop = asyncio.get_running_loop()
+        cached = await asyncio.gather(*[asyncio.to_thread(self._cached_only, p) for p in file_paths])
+        misses = [i for i, result in enumerate(cached) if result is None]
+        
+        local: List[int] = []
+        if ocr_service.engine == 'easyocr':
+            images = ocr_service.supported_image_formats
+            local = [i for i in misses if Path(file_paths[i]).suffix.lower() in images]
+            misses = [i for i in misses if Path(file_paths[i]).suffix.lower() not in images]
+        
+        async def in_process() -> List[Dict[str, Any]]:
+            if not local:
+                return []
+            return await asyncio.to_thread(self._detect_and_process_batch, [file_paths[i] for i in local])
+        
+        async def in_pool() -> List[Dict[str, Any]]:
+            if not misses:
+                return []
+            # forkserver: this process already runs threads (and maybe CUDA); workers are
+            # marked so they parse PDF pages themselves instead of nesting another pool
+            with ProcessPoolExecutor(max_workers=min(len(misses), os.cpu_count() or 1),
+                                     mp_context=mp_context(), initializer=mark_pool_worker) as executor:
+                return await asyncio.gather(*[
+                    loop.run_in_executor(executor, self.detect_and_process, file_paths[i]) for i in misses
+                ])
+        
+        batched, processed = await asyncio.gather(in_process(), in_pool())
+        for i, result in zip(local + misses, list(batched) + list(processed)):
+            cached[i] = result
+        
+        return cached
+    
+    def _cached_only(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Process a file only if its OCR result is already cached, else None"""
+        if Path(file_path).suffix.lower() not in self.ocr_formats or not Path(file_path).exists():
+            return None
+        ocr_result = self._cache_get(self._cache_key(file_path))
+        return self._process_file(file_path, ocr_result) if ocr_result is not None else None
+    
+    def _detect_and_process_batch(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+        """Process many files, OCR-ing all uncached images in one Tesseract invocation"""
+        ocr_results: Dict[int, Dict[str, Any]] = {}
+        pending: List[int] = []
+        keys: Dict[int, Optional[str]] = {}
+        
+        for i, p in enumerate(file_paths):
+            if Path(p).suffix.lower() in ocr_service.supported_image_formats and Path(p).exists():
+                keys[i] = self._cache_key(p)
+                cached = self._cache_get(keys[i])
+                if cached is not None:
+                    ocr_results[i] = cached
+                else:
+                    pending.append(i)
+        
+        if pending:
+            batch_results = ocr_service.batch_extract_images([file_paths[i] for i in pending])
+            for i, result in zip(pending, batch_results):
+                self._cache_put(keys[i], result)
+                ocr_results[i] = result
+        
+        return [self._process_file(p, ocr_results.get(i)) for i, p in enumerate(file_paths)]
+    
+    def _cache_key(self, file_path: str, data: Optional[bytes] = None) -> Optional[str]:
+        """blake2b hash of the OCR engine and file content, or None when caching is off
+        
+        `data` is the file's bytes when the caller already holds them; otherwise
+        the file is streamed in CACHE_HASH_CHUNK blocks.
+        """
+        if self._cache_dir is None:
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        # Tesseract and EasyOCR output differ, so switching engines must not hit old entries
+        h.update(ocr_service.engine.encode() + b'\0')
+        if data is not None:
+            h.update(data)
+        else:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CACHE_HASH_CHUNK), b''):
+                    h.update(chunk)
+        return h.hexdigest()
+    
+    def _cache_get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Cached OCR result for a content hash"""
+        if key is None:
+            return None
+        path = self._cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # mtime doubles as last-use time for LRU/age eviction
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable OCR cache entry {key}: {e}")
+            return None
+    
+    def _cache_put(self, key: Optional[str], ocr_result: Dict[str, Any]):
+        """Store an OCR result - only successful extractions, failures may be transient"""
+        if key is None or not ocr_result.get('text'):
+            return
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(ocr_result, f)
+            os.replace(tmp_path, self._cache_dir / f"{key}.json")
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry {key}: {e}")
+            return
+        if self._cache_writes % OCR_CACHE_PRUNE_EVERY == 0:
+            self._cache_prune()
+        self._cache_writes += 1
+    
+    def _cache_prune(self):
+        """Evict entries unused for OCR_CACHE_MAX_AGE, then the oldest until under OCR_CACHE_MAX_BYTES"""
+        entries = []
+        for entry in os.scandir(self._cache_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+        
+        cutoff = time.time() - OCR_CACHE_MAX_AGE if OCR_CACHE_MAX_AGE > 0 else float('-inf')
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= OCR_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+    
+    def _extract_cached(self, file_path: str) -> Dict[str, Any]:
+        """ocr_service.extract_text with the content-hash cache in front"""
+        # A PDF parsed in this process is read once, into one exact-size bytes object
+        # that both the hash and the parsers use (BytesIO over bytes shares, not copies).
+        # Large PDFs go to page-range workers that reopen the file, so they're only streamed.
+        data = None
+        if Path(file_path).suffix.lower() == '.pdf' and ocr_service.parses_pdf_in_process(file_path):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        key = self._cache_key(file_path, data)
+        ocr_result = self._cache_get(key)
+        if ocr_result is not None:
+            logger.info(f"OCR cache hit for {Path(file_path).name}")
+            return ocr_result
+        
+        ocr_result = ocr_service.extract_text(file_path, data)
+        self._cache_put(key, ocr_result)
+        return ocr_result
     
-    def detect_and_process(self, file_path: str) -> Dict[str, Any]:
-        """Enhanced file processing with OCR support"""
+    def _process_file(self, file_path: str, ocr_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Process a single file; ocr_result skips extraction when already computed"""
         try:
             path = Path(file_path)
             ext = path.suffix.lower()
@@ -52,7 +250,8 @@ class EnhancedFileHandler:
             elif ext in self.ocr_formats:
                 # OCR processing for documents and images
                 logger.info(f"Processing OCR file: {path.name}")
-                ocr_result = ocr_service.extract_text(file_path)
+                if ocr_result is None:
+                    ocr_result = self._extract_cached(file_path)
                 
                 processing_result = {
                     'success': True,
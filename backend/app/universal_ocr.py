@@ -1,109 +1,552 @@
 """
 Universal OCR Service - Extract text from ANY file type
-Supports: PDF, images, DOCX, TXT, CSV, Excel
+Supports: PDF (PyMuPDF, PyPDF2/pdfplumber fallback), images, DOCX, TXT, CSV, Excel
 """
 
 import os
+import mmap
+import time
+import asyncio
+import queue
+import hashlib
+import importlib
 import logging
-from typing import Dict, Any, Optional
-from pathlib import Path
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+from itertools import repeat
+from typing import Dict, Any, Optional, Tuple, List, Callable
+
+from app.services.ocr_config import ADAPTIVE_BLOCK_SIZE, ADAPTIVE_C, PARALLEL_PDF_MIN_PAGES, mp_context, page_ranges
+
+# Tesseract's OpenMP threads only contend with each other under concurrent load;
+# must be set before the library is loaded
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+# Optional in-process Tesseract - keeps the model loaded instead of spawning a
+# tesseract subprocess (and reloading the LSTM weights) for every image
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Bytes sampled for charset detection of non-UTF-8 text files
+ENCODING_SAMPLE_BYTES = 64 * 1024
+# charset_normalizer candidates within these margins of its best guess count as a tie;
+# ties go to the Western defaults, since short accented text scores alike in every Latin codepage
+ENCODING_TIE_CHAOS = 0.1
+ENCODING_TIE_COHERENCE = 0.02
+ENCODING_TIE_PREFERRED = ('cp1252', 'latin_1')
+
+# Values sampled per numeric column for streamed describe() quartiles (exact below this)
+DESCRIBE_SAMPLE_SIZE = 100_000
+
+# Grayscale variance above which an image counts as a clean scan and skips median blur
+CLEAN_IMAGE_MIN_VAR = 2000
+
+# Longest image side handed to Tesseract (~300 DPI for a letter/A4 page); larger inputs are downscaled
+MAX_OCR_SIDE = 3000
+# Skew (degrees) corrected before OCR; larger estimates are treated as layout, not skew
+MAX_DESKEW_ANGLE = 15
+
+# Max PyTessBaseAPI instances - one per concurrent OCR call, each holds a loaded model
+TESS_API_POOL_SIZE = os.cpu_count() or 1
+
+# Successful extractions keyed by (sha256 of file bytes, extension) - LRU, per process
+EXTRACT_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+EXTRACT_CACHE_MAX = 128
+# Seconds an entry stays valid; 0 keeps entries until evicted
+EXTRACT_CACHE_TTL = float(os.getenv('OCR_CACHE_TTL', '0'))
+_CACHE_LOCK = threading.Lock()
+
+# PyMuPDF is not thread-safe; its font/glyph store is process-wide, so threads
+# in one process share it but must take turns
+_FITZ_LOCK = threading.Lock()
+
+# Set in this module's pool workers - a worker parses its PDF's pages itself rather
+# than starting a nested pool (cpu_count workers each spawning cpu_count more)
+_IN_POOL_WORKER = False
+
+def _mark_pool_worker():
+    global _IN_POOL_WORKER
+    _IN_POOL_WORKER = True
+
+# Heavy optional dependencies, imported on first use (failures remembered too)
+_MODS: Dict[str, Any] = {}
+
+def _imp(name: str):
+    """Import a module once per process; re-raises the original ImportError on later calls"""
+    mod = _MODS.get(name)
+    if mod is None:
+        try:
+            mod = importlib.import_module(name)
+        except ImportError as e:
+            mod = e
+        _MODS[name] = mod
+    if isinstance(mod, ImportError):
+        # A fresh exception each time - re-raising the stored one would grow its traceback
+        raise ImportError(*mod.args, name=mod.name)
+    return mod
+
+def _suffix(file_path: str) -> str:
+    """Lowercased extension - os.path.splitext avoids building a Path object"""
+    return os.path.splitext(file_path)[1].lower()
+
+def _file_sha256(file_path: str) -> str:
+    """SHA-256 of a file, streamed (OpenSSL-backed file_digest on Python 3.11+)"""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+        return h.hexdigest()
+
+def _use_opencl() -> bool:
+    """Whether OpenCV has a usable OpenCL device (checked once per process)"""
+    use = _MODS.get('_opencl')
+    if use is None:
+        cv2 = _imp('cv2')
+        use = _MODS['_opencl'] = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+    return use
+
+def _has_text(text: Optional[str]) -> bool:
+    """Non-empty and not all whitespace - unlike strip(), never copies the string"""
+    return bool(text) and not text.isspace()
+
+def _guess_encodings(sample: bytes) -> List[str]:
+    """Likely encodings for a non-UTF-8 sample, most likely first (empty without charset_normalizer)"""
+    try:
+        matches = _imp('charset_normalizer').from_bytes(sample)
+    except ImportError:
+        return []
+    best = matches.best()
+    if best is None:
+        return []
+    tied = {m.encoding for m in matches
+            if m.chaos <= best.chaos + ENCODING_TIE_CHAOS
+            and m.coherence >= best.coherence - ENCODING_TIE_COHERENCE}
+    return [enc for enc in ENCODING_TIE_PREFERRED if enc in tied] + [best.encoding]
+
+def _to_8bit(img):
+    """Scale 16-bit grayscale (I;16*, I) down to 'L' - convert('L') would clip, not scale"""
+    if img.mode != 'I' and not img.mode.startswith('I;16'):
+        return img
+    np = _imp('numpy')
+    arr = np.asarray(img).astype(np.uint32) >> 8
+    return _imp('PIL.Image').fromarray(np.minimum(arr, 255).astype(np.uint8), 'L')
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[Tuple[str, str]]:
+    """
+    Extract pages [start, stop) of a PDF - module level so a page range can run in a worker
+    PDF objects don't pickle, so workers reopen the file by path, but each parser
+    opens it at most once per range; PyPDF2 and pdfplumber only once a page needs them.
+    Returns: one (page_text, method) per page - PyMuPDF first, PyPDF2 then pdfplumber
+    as per-page fallbacks
+    """
+    results: List[Tuple[str, str]] = []
+    with ExitStack() as stack:
+        opened: Dict[str, Any] = {}
+        
+        def doc(name: str, opener: Callable[[], Any]):
+            """Parser handle opened on first use; None when unavailable (tried only once)"""
+            if name not in opened:
+                try:
+                    opened[name] = opener()
+                except ImportError:
+                    opened[name] = None
+                except Exception as e:
+                    logger.warning(f"{name} could not open {file_path}: {e}")
+                    opened[name] = None
+            return opened[name]
+        
+        def open_fitz():
+            fitz = _imp('fitz')  # PyMuPDF - native MuPDF parser, much faster than the pure-Python ones
+            with _FITZ_LOCK:
+                handle = fitz.open(file_path)
+            stack.callback(_fitz_locked, handle.close)
+            return handle
+        
+        def open_pypdf2():
+            PyPDF2 = _imp('PyPDF2')
+            return PyPDF2.PdfReader(stack.enter_context(open(file_path, 'rb')))
+        
+        def open_pdfplumber():
+            # No laparams: that would switch on pdfminer's layout analysis, which
+            # text-only extraction never needs
+            return stack.enter_context(_imp('pdfplumber').open(file_path))
+        
+        for page_num in range(start, stop):
+            page_text, method = '', 'none'
+            
+            fitz_doc = doc('PyMuPDF', open_fitz)
+            if fitz_doc is not None:
+                try:
+                    with _FITZ_LOCK:
+                        page_text, method = fitz_doc[page_num].get_text(), 'PyMuPDF'
+                except Exception as e:
+                    logger.warning(f"PyMuPDF failed for {file_path} page {page_num + 1}: {e}")
+            
+            if not _has_text(page_text):
+                reader = doc('PyPDF2', open_pypdf2)
+                if reader is not None:
+                    try:
+                        page_text, method = reader.pages[page_num].extract_text(), 'PyPDF2'
+                    except Exception as e:
+                        logger.warning(f"PyPDF2 failed for {file_path} page {page_num + 1}: {e}")
+            
+            if not _has_text(page_text):
+                pdf = doc('pdfplumber', open_pdfplumber)
+                if pdf is not None:
+                    try:
+                        page = pdf.pages[page_num]
+                        # extract_text_simple (pdfplumber >= 0.10) skips the word/line layout pass
+                        page_text, method = getattr(page, 'extract_text_simple', page.extract_text)(), 'pdfplumber'
+                        # Drop the page's parsed objects so a long range doesn't accumulate them
+                        if hasattr(page, 'close'):
+                            page.close()
+                    except Exception as e:
+                        logger.warning(f"pdfplumber failed for {file_path} page {page_num + 1}: {e}")
+            
+            results.append((page_text, method) if _has_text(page_text) else ("", "none"))
+    return results
+
+def _fitz_locked(fn: Callable[[], Any]) -> Any:
+    """Call a PyMuPDF function under _FITZ_LOCK"""
+    with _FITZ_LOCK:
+        return fn()
+
+def _pdf_page_count(file_path: str) -> int:
+    """Page count from the PDF page tree, without extracting any text"""
+    try:
+        fitz = _imp('fitz')
+        with _FITZ_LOCK, fitz.open(file_path) as doc:
+            return doc.page_count
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"PyMuPDF could not read {file_path}: {e}")
+    
+    try:
+        PyPDF2 = _imp('PyPDF2')
+        with open(file_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    except Exception as e:
+        logger.warning(f"PyPDF2 could not read {file_path}: {e}")
+    
+    pdfplumber = _imp('pdfplumber')
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+# WordprocessingML tags in lxml's {namespace}local form
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_TR, _W_TC, _W_P, _W_T, _W_TAB = _W + 'tr', _W + 'tc', _W + 'p', _W + 't', _W + 'tab'
+_W_BREAKS = (_W + 'br', _W + 'cr')
+
+def _docx_cell_text(tc) -> str:
+    """Text of a <w:tc> straight from the XML - paragraphs joined like python-docx's cell.text"""
+    paragraphs = []
+    for p in tc.iterchildren(_W_P):
+        parts = []
+        for node in p.iter(_W_T, _W_TAB, *_W_BREAKS):
+            if node.tag == _W_T:
+                parts.append(node.text or '')
+            else:
+                parts.append('\t' if node.tag == _W_TAB else '\n')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+def _iter_docx_text(doc):
+    """Non-empty paragraphs, then table rows as 'a | b' lines after a TABLES marker"""
+    for paragraph in doc.paragraphs:
+        text = paragraph.text
+        if text.strip():
+            yield text
+    
+    marker = '\n--- TABLES ---'
+    for table in doc.tables:
+        # Walk the lxml tree directly - python-docx builds a wrapper object and
+        # resolves the grid for every cell, which dominates on large tables
+        for tr in table._element.iterchildren(_W_TR):
+            cells = [text for text in (_docx_cell_text(tc).strip() for tc in tr.iterchildren(_W_TC)) if text]
+            if cells:
+                if marker:
+                    yield marker
+                    marker = None
+                yield ' | '.join(cells)
+
+# Lazily started pool for CPU-bound extraction from async callers
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Shared ProcessPoolExecutor, created on first use"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=mp_context(),
+                                            initializer=_mark_pool_worker)
+    return _process_pool
+
+# Shared pool for extract_many - threads keep work in-process, next to the warm caches
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    """Shared ThreadPoolExecutor, created on first use"""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+    return _thread_pool
+
+def _extract_in_worker(file_path: str) -> Dict[str, Any]:
+    """Run the extractor for file_path with the worker process's own UniversalOCR"""
+    return universal_ocr._extract_uncached(file_path, UniversalOCR._EXT_TO_METHOD[_suffix(file_path)])
+
+def _describe_numeric(df):
+    """describe() of the numeric columns, or None when there are none"""
+    numeric = df.select_dtypes(include=['number'])
+    return numeric.describe() if len(numeric.columns) > 0 else None
+
+class _StreamingDescribe:
+    """
+    One-pass describe() over column chunks
+    count/mean/std/min/max are exact (Welford mean and M2, merged per chunk with
+    Chan's formula); quartiles come from a uniform bottom-k sample of
+    DESCRIBE_SAMPLE_SIZE values per column, so they are exact for smaller data.
+    """
+    
+    def __init__(self, n_cols: int):
+        np = _imp('numpy')
+        self.count = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+        self._rng = np.random.default_rng()
+        # Per column: sampled values and the random priorities that keep them
+        self._samples = [(np.empty(0), np.empty(0)) for _ in range(n_cols)]
+    
+    def update(self, columns: List[Any]):
+        np = _imp('numpy')
+        for i, col in enumerate(columns):
+            values = np.asarray(col, dtype=np.float64)
+            values = values[~np.isnan(values)]
+            n_b = values.size
+            if n_b == 0:
+                continue
+            mean_b = values.mean()
+            m2_b = np.square(values - mean_b).sum()
+            
+            n_a = self.count[i]
+            n = n_a + n_b
+            delta = mean_b - self.mean[i]
+            self.mean[i] += delta * n_b / n
+            self.m2[i] += m2_b + delta * delta * n_a * n_b / n
+            self.count[i] = n
+            self.min[i] = min(self.min[i], values.min())
+            self.max[i] = max(self.max[i], values.max())
+            
+            # Keep the DESCRIBE_SAMPLE_SIZE values with the smallest random priority
+            sample, keys = self._samples[i]
+            sample = np.concatenate([sample, values])
+            keys = np.concatenate([keys, self._rng.random(n_b)])
+            if sample.size > DESCRIBE_SAMPLE_SIZE:
+                keep = np.argpartition(keys, DESCRIBE_SAMPLE_SIZE)[:DESCRIBE_SAMPLE_SIZE]
+                sample, keys = sample[keep], keys[keep]
+            self._samples[i] = (sample, keys)
+    
+    def result(self, names: List[str]):
+        """Frame shaped like DataFrame.describe() for numeric columns"""
+        np = _imp('numpy')
+        pd = _imp('pandas')
+        seen = self.count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2 / (self.count - 1))
+        quartiles = np.array([np.quantile(sample, [0.25, 0.5, 0.75]) if sample.size else [np.nan] * 3
+                              for sample, _ in self._samples]).reshape(-1, 3)
+        rows = {
+            'count': self.count,
+            'mean': np.where(seen, self.mean, np.nan),
+            'std': np.where(self.count > 1, std, np.nan),
+            'min': np.where(seen, self.min, np.nan),
+            '25%': quartiles[:, 0],
+            '50%': quartiles[:, 1],
+            '75%': quartiles[:, 2],
+            'max': np.where(seen, self.max, np.nan),
+        }
+        return pd.DataFrame(rows, index=names).T
+
 class UniversalOCR:
     """Universal text extraction from any file type"""
     
+    supported_formats = frozenset({
+        # Text documents
+        '.txt', '.md', '.csv',
+        # Office documents
+        '.docx', '.doc',
+        # PDFs
+        '.pdf',
+        # Images
+        '.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif',
+        # Spreadsheets
+        '.xlsx', '.xls'
+    })
+    
+    _EXT_TO_CONTENT = {
+        **dict.fromkeys(('.csv', '.xlsx', '.xls'), 'data'),
+        '.docx': 'document',
+        '.pdf': 'pdf_document',
+        **dict.fromkeys(('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'), 'image_with_text'),
+        '.txt': 'text_file',
+    }
+    
     def __init__(self):
-        self.supported_formats = {
-            # Text documents
-            '.txt', '.md', '.csv',
-            # Office documents  
-            '.docx', '.doc',
-            # PDFs
-            '.pdf',
-            # Images
-            '.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif',
-            # Spreadsheets
-            '.xlsx', '.xls'
-        }
+        # PyTessBaseAPI is not thread-safe, so each call checks one out of a pool
+        self._tess_pool: "queue.Queue" = queue.Queue()
+        self._tess_created = 0
+        self._tess_lock = threading.Lock()
+        self._local = threading.local()
+        
+        # Optional GPU OCR backend, selected at runtime; the model is loaded on the
+        # first image OCR (see _get_paddle), not at import in every process
+        self._paddle_wanted = os.getenv('OCR_BACKEND', 'tesseract').lower() == 'paddle'
+        self._paddle = None
+        self._paddle_lock = threading.Lock()
     
     def extract_text(self, file_path: str) -> Dict[str, Any]:
         """
         Extract text from any supported file type
         Returns: {'text': content, 'method': extraction_method, 'success': bool}
         """
-        if not os.path.exists(file_path):
-            return {'text': '', 'method': 'error', 'success': False, 'error': 'File not found'}
+        result, key, extractor = self._lookup(file_path)
+        if result is not None:
+            return result
+        return self._cache_put(key, self._extract_uncached(file_path, extractor))
+    
+    def extract_many(self, file_paths: List[str],
+                     callback: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Extract text from many files on the shared thread pool
+        callback(path, result) is called as each file finishes (completion order).
+        Returns: [(path, result)] in input order
+        """
+        futures = {_get_thread_pool().submit(self.extract_text, path): i for i, path in enumerate(file_paths)}
+        results: List[Optional[Tuple[str, Dict[str, Any]]]] = [None] * len(file_paths)
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = (file_paths[i], future.result())
+            if callback is not None:
+                callback(*results[i])
+        return results
+    
+    async def extract_text_async(self, file_path: str) -> Dict[str, Any]:
+        """
+        extract_text without blocking the event loop
+        Image OCR is CPU-bound and runs in a process pool; hashing, cache lookups,
+        the I/O-bound extractors and PDFs run on threads (_extract_pdf starts its
+        own page-range pool, which a pool worker is not allowed to do).
+        """
+        result, key, extractor = await asyncio.to_thread(self._lookup, file_path)
+        if result is not None:
+            return result
         
-        file_ext = Path(file_path).suffix.lower()
+        # The GPU model lives in this process; a worker would load its own copy
+        on_gpu = self._use_paddle() and extractor is UniversalOCR._extract_image
+        if extractor in CPU_BOUND_EXTRACTORS and not on_gpu:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(_get_process_pool(), _extract_in_worker, file_path)
+        else:
+            result = await asyncio.to_thread(self._extract_uncached, file_path, extractor)
+        # Cache in this process - the worker's own cache is never consulted
+        return self._cache_put(key, result)
+    
+    def _lookup(self, file_path: str):
+        """
+        Validate, pick the extractor and check the cache
+        Returns: (final result or None, cache key, extractor)
+        """
+        try:
+            size = os.stat(file_path).st_size
+        except OSError:
+            return {'text': '', 'method': 'error', 'success': False, 'error': 'File not found'}, None, None
+        
+        file_ext = _suffix(file_path)
+        extractor = self._EXT_TO_METHOD.get(file_ext)
+        if extractor is None:
+            return {'text': '', 'method': 'unsupported', 'success': False, 'error': f'Unsupported format: {file_ext}'}, None, None
+        logger.debug(f"Extracting {file_path} ({size} bytes) with {extractor.__name__}")
         
+        # Identical bytes give identical text - skip the parse/OCR pipeline on re-uploads
         try:
-            if file_ext == '.txt':
-                return self._extract_txt(file_path)
-            elif file_ext == '.docx':
-                return self._extract_docx(file_path)
-            elif file_ext == '.pdf':
-                return self._extract_pdf(file_path)
-            elif file_ext in {'.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'}:
-                return self._extract_image(file_path)
-            elif file_ext in {'.csv', '.xlsx', '.xls'}:
-                return self._extract_data_file(file_path)
-            else:
-                return {'text': '', 'method': 'unsupported', 'success': False, 'error': f'Unsupported format: {file_ext}'}
-                
+            key = (_file_sha256(file_path), file_ext)
+        except OSError as e:
+            logger.warning(f"Could not hash {file_path}: {e}")
+            key = None
+        return self._cache_get(key), key, extractor
+    
+    def _cache_put(self, key: Optional[Tuple[str, str]], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a result and return a caller-owned copy of it"""
+        # Failures are not cached - a missing library or transient error may be fixed next time
+        if key is not None and result.get('success'):
+            with _CACHE_LOCK:
+                EXTRACT_CACHE[key] = (time.monotonic(), result)
+                EXTRACT_CACHE.move_to_end(key)
+                while len(EXTRACT_CACHE) > EXTRACT_CACHE_MAX:
+                    EXTRACT_CACHE.popitem(last=False)
+        return dict(result)
+    
+    def _cache_get(self, key: Optional[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """Cached extraction for a content key, honouring OCR_CACHE_TTL"""
+        if key is None:
+            return None
+        with _CACHE_LOCK:
+            entry = EXTRACT_CACHE.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if EXTRACT_CACHE_TTL and time.monotonic() - stored_at > EXTRACT_CACHE_TTL:
+                del EXTRACT_CACHE[key]
+                return None
+            EXTRACT_CACHE.move_to_end(key)
+        return dict(result)
+    
+    def _extract_uncached(self, file_path: str, extractor) -> Dict[str, Any]:
+        """Run an extractor from _EXT_TO_METHOD, turning exceptions into error results"""
+        try:
+            return extractor(self, file_path)
         except Exception as e:
             logger.error(f"OCR extraction failed for {file_path}: {e}")
             return {'text': '', 'method': 'error', 'success': False, 'error': str(e)}
     
     def _extract_txt(self, file_path: str) -> Dict[str, Any]:
-        """Extract text from TXT files"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            return {'text': text, 'method': 'direct_read', 'success': True}
-        except UnicodeDecodeError:
-            # Try different encodings
-            for encoding in ['latin-1', 'cp1252', 'utf-16']:
+        """Extract text from TXT files - one mapped read, encoding detected from a sample"""
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return {'text': '', 'method': 'direct_read', 'success': True}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # str() decodes straight from the mapping, no intermediate bytes copy
                 try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        text = f.read()
-                    return {'text': text, 'method': f'direct_read_{encoding}', 'success': True}
-                except:
-                    continue
-            return {'text': '', 'method': 'encoding_error', 'success': False, 'error': 'Could not decode text file'}
+                    return {'text': str(mm, 'utf-8'), 'method': 'direct_read', 'success': True}
+                except UnicodeDecodeError:
+                    pass
+                
+                # latin-1 maps every byte, so it is the last resort that always decodes
+                for encoding in _guess_encodings(mm[:ENCODING_SAMPLE_BYTES]) + ['latin-1']:
+                    try:
+                        return {'text': str(mm, encoding), 'method': f'direct_read_{encoding}', 'success': True}
+                    except (UnicodeDecodeError, LookupError):
+                        continue
+        return {'text': '', 'method': 'encoding_error', 'success': False, 'error': 'Could not decode text file'}
     
     def _extract_docx(self, file_path: str) -> Dict[str, Any]:
         """Extract text from DOCX files"""
         try:
-            from docx import Document
+            Document = _imp('docx').Document
             doc = Document(file_path)
             
-            # Extract paragraphs
-            paragraphs = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    paragraphs.append(paragraph.text)
-            
-            # Extract tables
-            tables_text = []
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
-                    if row_text:
-                        tables_text.append(' | '.join(row_text))
-            
-            # Combine all text
-            all_text = []
-            if paragraphs:
-                all_text.extend(paragraphs)
-            if tables_text:
-                all_text.append('\n--- TABLES ---')
-                all_text.extend(tables_text)
-            
-            final_text = '\n\n'.join(all_text)
+            final_text = '\n\n'.join(_iter_docx_text(doc))
             return {'text': final_text, 'method': 'python_docx', 'success': True}
             
         except ImportError:
@@ -112,83 +555,163 @@ class UniversalOCR:
             return {'text': '', 'method': 'docx_error', 'success': False, 'error': str(e)}
     
     def _extract_pdf(self, file_path: str) -> Dict[str, Any]:
-        """Extract text from PDF files"""
-        text_content = ""
-        method = "none"
-        
-        # Method 1: Try PyPDF2 first (faster)
+        """Extract text from PDF files, one contiguous page range per worker for large documents"""
         try:
-            import PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                pages_text = []
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        pages_text.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                
-                if pages_text:
-                    text_content = '\n\n'.join(pages_text)
-                    method = "PyPDF2"
+            page_count = _pdf_page_count(file_path)
         except Exception as e:
-            logger.warning(f"PyPDF2 failed for {file_path}: {e}")
+            logger.warning(f"Could not open PDF {file_path}: {e}")
+            page_count = 0
+        
+        if page_count >= PARALLEL_PDF_MIN_PAGES and not _IN_POOL_WORKER:
+            workers = min(page_count, os.cpu_count() or 1)
+            starts, stops = zip(*page_ranges(page_count, workers))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context(),
+                                     initializer=_mark_pool_worker) as executor:
+                chunks = executor.map(_extract_pdf_pages, repeat(file_path), starts, stops)
+                results = [page for chunk in chunks for page in chunk]
+        else:
+            results = _extract_pdf_pages(file_path, 0, page_count)
         
-        # Method 2: Try pdfplumber if PyPDF2 fails or gives poor results
-        if not text_content or len(text_content.strip()) < 50:
-            try:
-                import pdfplumber
-                with pdfplumber.open(file_path) as pdf:
-                    pages_text = []
-                    for page_num, page in enumerate(pdf.pages):
-                        page_text = page.extract_text()
-                        if page_text and page_text.strip():
-                            pages_text.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                    
-                    if pages_text:
-                        text_content = '\n\n'.join(pages_text)
-                        method = "pdfplumber"
-            except ImportError:
-                pass
-            except Exception as e:
-                logger.warning(f"pdfplumber failed for {file_path}: {e}")
+        pages_text = [f"--- Page {page_num + 1} ---\n{page_text}"
+                      for page_num, (page_text, _) in enumerate(results) if page_text]
+        methods = sorted({method for page_text, method in results if page_text}, reverse=True)
         
-        if text_content.strip():
-            return {'text': text_content, 'method': method, 'success': True}
+        if pages_text:
+            return {'text': '\n\n'.join(pages_text), 'method': '+'.join(methods), 'success': True}
         else:
             return {'text': '', 'method': 'pdf_no_text', 'success': False, 'error': 'No text found in PDF'}
     
+    @contextmanager
+    def _tess_api(self):
+        """Borrow a PyTessBaseAPI, creating up to TESS_API_POOL_SIZE on demand"""
+        try:
+            api = self._tess_pool.get_nowait()
+        except queue.Empty:
+            api = None
+            with self._tess_lock:
+                if self._tess_created < TESS_API_POOL_SIZE:
+                    api = PyTessBaseAPI(psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY)
+                    self._tess_created += 1
+            if api is None:
+                api = self._tess_pool.get()
+        try:
+            yield api
+        finally:
+            self._tess_pool.put(api)
+    
+    def _clahe(self):
+        """Per-thread CLAHE - the OpenCV object keeps scratch buffers, so it isn't shareable"""
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            cv2 = _imp('cv2')
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        return clahe
+    
+    def _deskew(self, gray):
+        """Rotate a grayscale page so its text lines are horizontal"""
+        cv2 = _imp('cv2')
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        points = cv2.findNonZero(ink)
+        if points is None:
+            return gray
+        
+        # minAreaRect's angle range differs across OpenCV versions; fold into [-45, 45)
+        angle = (cv2.minAreaRect(points)[2] + 45) % 90 - 45
+        # Large angles are more often non-text content than a skewed scan
+        if not 0.5 <= abs(angle) <= MAX_DESKEW_ANGLE:
+            return gray
+        
+        h, w = gray.shape
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        return cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    
+    def _use_paddle(self) -> bool:
+        """Whether image OCR goes to PaddleOCR - never in pool workers, which would each load the model"""
+        return self._paddle_wanted and not _IN_POOL_WORKER
+    
+    def _get_paddle(self):
+        """PaddleOCR model, loaded once on first use; None when not selected or it failed to load"""
+        if not self._use_paddle():
+            return None
+        with self._paddle_lock:
+            if self._paddle is None and self._paddle_wanted:
+                try:
+                    self._paddle = _imp('paddleocr').PaddleOCR(use_angle_cls=True, lang='en', use_gpu=True)
+                except Exception as e:
+                    logger.warning(f"PaddleOCR unavailable, falling back to Tesseract: {e}")
+                    self._paddle_wanted = False
+        return self._paddle
+    
+    def _paddle_ocr(self, paddle, image) -> Dict[str, Any]:
+        """OCR a BGR array with PaddleOCR - result lines are [box, (text, confidence)]"""
+        # The predictor isn't thread-safe; the GPU serializes the work anyway
+        with self._paddle_lock:
+            pages = paddle.ocr(image, cls=True)
+        text = '\n'.join(line[1][0] for block in pages if block for line in block).strip()
+        
+        if text:
+            return {'text': text, 'method': 'paddle_ocr', 'success': True}
+        else:
+            return {'text': '', 'method': 'ocr_no_text', 'success': False, 'error': 'No text detected in image'}
+    
     def _extract_image(self, file_path: str) -> Dict[str, Any]:
         """Extract text from images using OCR"""
         try:
-            import pytesseract
-            from PIL import Image
-            import cv2
-            import numpy as np
+            Image = _imp('PIL.Image')
+            ImageOps = _imp('PIL.ImageOps')
+            cv2 = _imp('cv2')
+            np = _imp('numpy')
+            
+            # Deep OCR models do their own preprocessing and want colour input
+            paddle = self._get_paddle()
+            mode = 'RGB' if paddle is not None else 'L'
             
-            # Load image
-            image = cv2.imread(file_path)
-            if image is None:
-                # Fallback to PIL
-                pil_image = Image.open(file_path)
-                image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            # Decode with Pillow straight to 8-bit grayscale - no BGR copy to convert;
+            # 16-bit scans (medical/archival TIFFs) are scaled down first
+            with Image.open(file_path) as img:
+                # Tesseract time grows with pixel count; past ~300 DPI page size there is no
+                # accuracy gain. For JPEGs draft() makes the decoder itself scale down (DCT
+                # scaling), so a 48 MP photo is never expanded in memory.
+                w, h = img.size
+                scale = MAX_OCR_SIDE / max(w, h)
+                if scale < 1:
+                    img.draft(mode, (int(w * scale), int(h * scale)))
+                # Phone photos store rotation in EXIF (cv2.imread applied it implicitly)
+                img = _to_8bit(ImageOps.exif_transpose(img)).convert(mode)
+            if max(img.size) > MAX_OCR_SIDE:
+                img.thumbnail((MAX_OCR_SIDE, MAX_OCR_SIDE), Image.Resampling.BOX)
+            
+            if paddle is not None:
+                # PaddleOCR takes OpenCV-style BGR arrays
+                return self._paddle_ocr(paddle, np.ascontiguousarray(np.asarray(img)[:, :, ::-1]))
             
             # Preprocess image for better OCR
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = self._deskew(np.array(img))
             
-            # Apply denoising
-            denoised = cv2.medianBlur(gray, 3)
+            # With OpenCL the filter chain runs on the GPU (UMat), leaving the CPU to Tesseract
+            noisy = gray.var() < CLEAN_IMAGE_MIN_VAR
+            buf = cv2.UMat(gray) if _use_opencl() else gray
             
-            # Increase contrast
-            contrast = cv2.convertScaleAbs(denoised, alpha=1.5, beta=0)
+            # Denoise only low-contrast (likely noisy) inputs - on clean scans it just blurs glyphs
+            if noisy:
+                cv2.medianBlur(buf, 3, dst=buf)
             
-            # Apply threshold
-            _, binary = cv2.threshold(contrast, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            # Tile-local contrast (CLAHE), then a per-region threshold that copes with
+            # uneven lighting where one global Otsu split fails - in place on one buffer
+            self._clahe().apply(buf, dst=buf)
+            cv2.adaptiveThreshold(buf, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                  ADAPTIVE_BLOCK_SIZE, ADAPTIVE_C, dst=buf)
+            binary = buf.get() if isinstance(buf, cv2.UMat) else buf
             
             # Extract text
-            custom_config = r'--oem 3 --psm 6'
-            text = pytesseract.image_to_string(binary, config=custom_config)
+            if TESSEROCR_AVAILABLE:
+                with self._tess_api() as api:
+                    api.SetImage(Image.fromarray(binary))
+                    text = api.GetUTF8Text()
+            else:
+                pytesseract = _imp('pytesseract')
+                custom_config = r'--oem 3 --psm 6'
+                text = pytesseract.image_to_string(binary, config=custom_config)
             
             if text.strip():
                 return {'text': text.strip(), 'method': 'tesseract_ocr', 'success': True}
@@ -203,29 +726,30 @@ class UniversalOCR:
     def _extract_data_file(self, file_path: str) -> Dict[str, Any]:
         """Extract text summary from data files (CSV, Excel)"""
         try:
-            import pandas as pd
+            pd = _imp('pandas')
             
-            # Load data file
+            # Load data file - CSVs are streamed, only the preview rows become pandas objects
             if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+                n_rows, columns, head, stats = self._load_csv_summary(file_path)
             else:  # Excel
                 df = pd.read_excel(file_path)
+                n_rows, columns, head = len(df), df.columns.tolist(), df.head(3)
+                stats = _describe_numeric(df)
             
             # Create text summary
             summary_parts = []
-            summary_parts.append(f"Dataset Summary: {df.shape[0]} rows, {df.shape[1]} columns")
-            summary_parts.append(f"Columns: {', '.join(df.columns.tolist())}")
+            summary_parts.append(f"Dataset Summary: {n_rows} rows, {len(columns)} columns")
+            summary_parts.append(f"Columns: {', '.join(columns)}")
             
             # Add sample data
-            if len(df) > 0:
+            if n_rows > 0:
                 summary_parts.append("\nFirst 3 rows:")
-                summary_parts.append(df.head(3).to_string())
+                summary_parts.append(head.to_string())
             
             # Add basic statistics for numeric columns
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
+            if stats is not None:
                 summary_parts.append(f"\nNumeric columns statistics:")
-                summary_parts.append(df[numeric_cols].describe().to_string())
+                summary_parts.append(stats.to_string())
             
             text_summary = '\n'.join(summary_parts)
             return {'text': text_summary, 'method': 'pandas_summary', 'success': True}
@@ -233,27 +757,65 @@ class UniversalOCR:
         except Exception as e:
             return {'text': '', 'method': 'data_error', 'success': False, 'error': str(e)}
     
+    def _load_csv_summary(self, file_path: str):
+        """
+        Row count, column names, first 3 rows and numeric describe() of a CSV
+        Streams Arrow record batches through a one-pass accumulator, so the file
+        is never materialized; string columns are never converted at all.
+        """
+        pd = _imp('pandas')
+        try:
+            pa = _imp('pyarrow')
+            pacsv = _imp('pyarrow.csv')
+            reader = pacsv.open_csv(file_path)
+            numeric_idx = [i for i, field in enumerate(reader.schema)
+                           if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+            stats = _StreamingDescribe(len(numeric_idx))
+            n_rows, head_batches, head_rows = 0, [], 0
+            for batch in reader:
+                n_rows += batch.num_rows
+                if head_rows < 3:
+                    head_batches.append(batch.slice(0, 3 - head_rows))
+                    head_rows += head_batches[-1].num_rows
+                if numeric_idx:
+                    stats.update([batch.column(i).to_numpy(zero_copy_only=False) for i in numeric_idx])
+        except ImportError:
+            reader = None
+        except Exception as e:
+            # Arrow is stricter than pandas (ragged rows, odd quoting, a type
+            # change after the block the schema was inferred from)
+            logger.warning(f"Arrow CSV reader failed for {file_path}, using pandas: {e}")
+            reader = None
+        
+        if reader is None:
+            df = pd.read_csv(file_path)
+            return len(df), df.columns.tolist(), df.head(3), _describe_numeric(df)
+        
+        head = pa.Table.from_batches(head_batches, schema=reader.schema).to_pandas()
+        names = reader.schema.names
+        return (n_rows, names, head,
+                stats.result([names[i] for i in numeric_idx]) if numeric_idx else None)
+    
     def is_supported(self, file_path: str) -> bool:
         """Check if file type is supported"""
-        ext = Path(file_path).suffix.lower()
-        return ext in self.supported_formats
+        return _suffix(file_path) in self.supported_formats
     
     def get_content_type(self, file_path: str, extracted_text: str) -> str:
         """Determine content type based on file and text"""
-        ext = Path(file_path).suffix.lower()
-        
-        if ext in {'.csv', '.xlsx', '.xls'}:
-            return 'data'
-        elif ext == '.docx':
-            return 'document'
-        elif ext == '.pdf':
-            return 'pdf_document'
-        elif ext in {'.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'}:
-            return 'image_with_text'
-        elif ext == '.txt':
-            return 'text_file'
-        else:
-            return 'unknown'
+        return self._EXT_TO_CONTENT.get(_suffix(file_path), 'unknown')
+    
+    # Extension -> extractor, built once with the class instead of an if/elif chain per call
+    _EXT_TO_METHOD = {
+        '.txt': _extract_txt,
+        '.docx': _extract_docx,
+        '.pdf': _extract_pdf,
+        **dict.fromkeys(('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'), _extract_image),
+        **dict.fromkeys(('.csv', '.xlsx', '.xls'), _extract_data_file),
+    }
+
+# Extractors worth a process hop from extract_text_async (OCR, not file reads; PDFs
+# parallelize their own pages)
+CPU_BOUND_EXTRACTORS = frozenset({UniversalOCR._extract_image})
 
 # Global OCR instance
 universal_ocr = UniversalOCR()
@@ -0,0 +1,29 @@
+"""
+Tests for the core data service
+"""
+
+import pytest
+
+from app.services.core_data import data
+
+
+@pytest.mark.parametrize("name, head, expected", [
+    ("report.pdf", b"%PDF-1.7\n", True),
+    ("scan.png", b"\x89PNG\r\n\x1a\n\x00", True),
+    ("photo.jpg", b"\xff\xd8\xff\xe0", True),
+    ("anim.gif", b"GIF89a", True),
+    ("scan.tiff", b"II*\x00", True),
+    ("letter.docx", b"PK\x03\x04", True),
+    ("sheet.xlsx", b"PK\x03\x04", False),
+    ("table.csv", b"a,b,c\n1,2,3\n", False),
+    ("rows.json", b'[{"a": 1}]', False),
+    ("empty.csv", b"", False),
+])
+def test_is_non_tabular(tmp_path, name, head, expected):
+    path = tmp_path / name
+    path.write_bytes(head)
+    assert data.is_non_tabular(str(path)) is expected
+
+
+def test_is_non_tabular_missing_file(tmp_path):
+    assert data.is_non_tabular(str(tmp_path / "missing.csv")) is False
@@ -0,0 +1,21 @@
+"""
+Tests for the simple code executor
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from app.services.intelligent_code_executor import executor
+
+
+def test_concurrent_executions_capture_only_their_own_output():
+    frames = [pd.DataFrame({f"col_{i}": range(50)}) for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda df: executor.execute("df.info()", df), frames * 4))
+
+    for df, result in zip(frames * 4, results):
+        assert result['success']
+        assert f"{df.columns[0]} " in result['output']
+        assert result['output'].count("RangeIndex: 50 entries") == 1
@@ -0,0 +1,60 @@
+"""
+Tests for the minimal API's chart endpoints
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main_minimal import _load_df, app, uploaded_files
+from app.services.core_data import data
+
+client = TestClient(app)
+
+
+def test_correlation_chart_honours_if_none_match(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame(np.random.default_rng(0).random((30, 3)), columns=list("abc")).to_csv(path, index=False)
+    uploaded_files["etag-test"] = {"file_type": "data", "file_path": str(path)}
+
+    first = client.get("/api/v1/charts/etag-test/correlation")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/api/v1/charts/etag-test/correlation", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    key = etag.strip('"')
+    figure = client.get(f"/figures/{key}.png", headers={"If-None-Match": f"W/{etag}"})
+    assert figure.status_code == 304
+    assert client.get(f"/figures/{key}.png").content == first.content
+
+
+def test_load_df_reads_parquet_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"x": [1, 2, 3], "y": [0.5, np.nan, 2.5], "name": ["a", "b", None]})
+    parquet_path = data.cache_parquet(df, str(tmp_path / "cached.parquet"))
+    assert parquet_path is not None
+
+    info = {"cached_parquet_path": parquet_path, "file_path": str(tmp_path / "gone.csv")}
+    pd.testing.assert_frame_equal(_load_df(info), df)
+
+
+@pytest.mark.parametrize("content", [
+    "[[1, 2], [3, 4]]",                                 # integer column names
+    '[{"v": 1}, {"v": "x"}, {"v": 2.5}]',               # mixed-type object column
+])
+def test_load_df_falls_back_to_original_file(tmp_path, content):
+    """When the parquet cache is skipped, reloads re-read the uploaded file"""
+    path = tmp_path / "upload.json"
+    path.write_text(content)
+    uploaded = data.load_file(str(path))
+
+    info = {"cached_parquet_path": data.cache_parquet(uploaded, str(tmp_path / "cached.parquet")),
+            "file_path": str(path)}
+
+    assert info["cached_parquet_path"] is None
+    assert not (tmp_path / "cached.parquet").exists()
+    pd.testing.assert_frame_equal(_load_df(info), uploaded)
@@ -0,0 +1,113 @@
+"""
+Tests for the OCR service
+"""
+
+import pytest
+
+from app.services.ocr_service import ocr_service
+
+
+def _text_pdf(path, pages):
+    """PDF with one line of text per page; None entries make blank pages"""
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    pdf = canvas.Canvas(str(path))
+    for text in pages:
+        if text:
+            pdf.drawString(72, 720, text)
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+def test_scanned_first_page_keeps_text_layer_of_later_pages(tmp_path):
+    """A blank cover page must not throw away the text of the pages after it"""
+    path = _text_pdf(tmp_path / "cover.pdf", [None, "Quarterly revenue grew", "Costs were flat"])
+
+    result = ocr_service.extract_text(path)
+
+    assert "Quarterly revenue grew" in result['text']
+    assert "Costs were flat" in result['text']
+    assert result['error'] is None
+
+
+def test_extract_many_sends_only_images_to_the_image_pool(tmp_path, monkeypatch):
+    """PDFs in a mixed batch must go through the PDF path, not image OCR"""
+    from app.services import ocr_service as ocr_module
+    pdf = _text_pdf(tmp_path / "report.pdf", ["Quarterly revenue grew"])
+    images = []
+    for name in ("a.png", "b.png"):
+        (tmp_path / name).write_bytes(b"")
+        images.append(str(tmp_path / name))
+    monkeypatch.setattr(ocr_module, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(ocr_service, "_reader", object())
+    seen = []
+    monkeypatch.setattr(ocr_service, "batch_extract_images",
+                        lambda paths: seen.extend(paths) or [{'text': p, 'error': None} for p in paths])
+
+    results = ocr_service.extract_many([images[0], pdf, images[1]])
+
+    assert seen == images
+    assert [r['text'] for r in (results[0], results[2])] == images
+    assert "Quarterly revenue grew" in results[1]['text']
+
+
+def test_pdf_is_opened_once_per_page_range(tmp_path, monkeypatch):
+    from app.services import ocr_service as ocr_module
+    path = _text_pdf(tmp_path / "doc.pdf", [f"page {i}" for i in range(6)])
+    opens = []
+    real_open = ocr_module.pdfplumber.open
+    monkeypatch.setattr(ocr_module.pdfplumber, "open", lambda *a, **k: opens.append(a) or real_open(*a, **k))
+
+    results = ocr_module._extract_page_range(path, 0, 6)
+
+    assert len(opens) == 1
+    assert [text for text, _ in results] == [f"page {i}" for i in range(6)]
+
+
+def test_large_pdf_pool_keeps_order_and_never_forks(tmp_path, monkeypatch):
+    from app.services import ocr_service as ocr_module
+    path = _text_pdf(tmp_path / "doc.pdf", [f"page {i}" for i in range(9)])
+    monkeypatch.setattr(ocr_module, "PARALLEL_PDF_MIN_PAGES", 2)
+    monkeypatch.setattr(ocr_module.os, "cpu_count", lambda: 3)
+    contexts = []
+    real_pool = ocr_module.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs.get("mp_context"))
+        return real_pool(*args, **kwargs)
+    monkeypatch.setattr(ocr_module, "ProcessPoolExecutor", recording_pool)
+
+    result = ocr_service.extract_text(path)
+
+    assert [ctx.get_start_method() for ctx in contexts] in (["forkserver"], ["spawn"])
+    assert result['text'].split("\n\n--- PAGE BREAK ---\n\n") == [f"page {i}" for i in range(9)]
+
+
+def test_batch_extract_images_aligns_pages_with_inputs(tmp_path, monkeypatch):
+    """Form-feed pages map back to their inputs; an unreadable image gets its own error"""
+    from app.services import ocr_service as ocr_module
+    np = pytest.importorskip("numpy")
+    cv2 = pytest.importorskip("cv2")
+    paths = [str(tmp_path / name) for name in ("first.png", "broken.png", "second.png")]
+    cv2.imwrite(paths[0], np.full((32, 32, 3), 255, np.uint8))
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    cv2.imwrite(paths[2], np.zeros((32, 32, 3), np.uint8))
+    monkeypatch.setattr(ocr_module, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(ocr_service, "_reader", None)
+    monkeypatch.setattr(ocr_service, "_easyocr_wanted", False)
+    listed = []
+
+    def image_to_string(list_path, config=None):
+        with open(list_path) as f:
+            listed.extend(f.read().split())
+        return "a\x0cb\x0c"
+
+    monkeypatch.setattr(ocr_module.pytesseract, "image_to_string", image_to_string)
+
+    results = ocr_service.batch_extract_images(paths)
+
+    assert len(listed) == 2
+    assert [r['text'] for r in results] == ["a", "", "b"]
+    assert [r['method'] for r in results] == ["tesseract_batch", "tesseract_error", "tesseract_batch"]
+    assert results[0]['error'] is None and results[2]['error'] is None
+    assert results[1]['error']
@@ -0,0 +1,42 @@
+"""
+Tests for the response enhancer
+"""
+
+import random
+import re
+
+import pytest
+
+from app.services.response_enhancer import enhance_response
+
+
+def _regex_reference(text):
+    """The original regex implementation, for text outside code blocks"""
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    return re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("**bold** and *italic*", "<strong>bold</strong> and <em>italic</em>"),
+    ("a ```x = **y** * 2``` b", "a <pre><code>x = **y** * 2</code></pre> b"),
+    ("```py\nprint(*args)\n``` then **done**", "<pre><code>py\nprint(*args)\n</code></pre> then <strong>done</strong>"),
+    ("```unclosed **b**", "```unclosed <strong>b</strong>"),
+    ("*spans\nlines*", "*spans\nlines*"),
+    ("a lone * star", "a lone * star"),
+    ("", ""),
+])
+def test_enhance_response(text, expected):
+    assert enhance_response(text) == expected
+
+
+def test_scanner_matches_regex_semantics():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = ''.join(rng.choice('*ab \n') for _ in range(rng.randint(0, 16)))
+        assert enhance_response(text) == _regex_reference(text), repr(text)
+
+
+def test_unclosed_markers_stay_linear():
+    # The regexes backtracked quadratically on thousands of unclosed markers
+    text = "*" + "a*\n" * 50_000 + "**x" * 50_000
+    assert enhance_response(text).endswith("x")
@@ -0,0 +1,165 @@
+"""
+Tests for the file handler's on-disk OCR cache
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.services import ocr_service as ocr_module
+from app.services import universal_file_handler as ufh
+from app.services.ocr_service import ocr_service
+
+
+def _result(text):
+    return {'text': text, 'method': 'tesseract', 'confidence': 90, 'error': None}
+
+
+def test_cache_dir_is_created_on_first_write(tmp_path):
+    cache_dir = tmp_path / "ocr_cache"
+    handler = ufh.EnhancedFileHandler(cache_dir=str(cache_dir))
+    assert not cache_dir.exists()
+
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"not really a png")
+    key = handler._cache_key(str(image))
+    handler._cache_put(key, _result("hello"))
+
+    assert handler._cache_get(key) == _result("hello")
+
+
+def test_cache_can_be_disabled(tmp_path):
+    handler = ufh.EnhancedFileHandler(cache_dir="")
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"bytes")
+    assert handler._cache_key(str(image)) is None
+
+
+def test_cache_key_depends_on_engine(tmp_path, monkeypatch):
+    handler = ufh.EnhancedFileHandler(cache_dir=str(tmp_path / "cache"))
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"bytes")
+    tesseract_key = handler._cache_key(str(image))
+
+    monkeypatch.setattr(ocr_service, "_reader", object())
+    assert ocr_service.engine == "easyocr"
+    assert handler._cache_key(str(image)) != tesseract_key
+
+
+def test_prune_evicts_least_recently_used_over_size_cap(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    handler = ufh.EnhancedFileHandler(cache_dir=str(cache_dir))
+    for i, key in enumerate(["old", "used", "new"]):
+        handler._cache_put(key, _result("x" * 1000))
+        os.utime(cache_dir / f"{key}.json", (1000 + i, 1000 + i))
+    # A hit refreshes the entry, so "old" is now the least recently used
+    os.utime(cache_dir / "used.json", (5000, 5000))
+    entry_size = (cache_dir / "new.json").stat().st_size
+    monkeypatch.setattr(ufh, "OCR_CACHE_MAX_AGE", 0)
+    monkeypatch.setattr(ufh, "OCR_CACHE_MAX_BYTES", 2 * entry_size)
+
+    handler._cache_prune()
+
+    assert sorted(p.name for p in cache_dir.glob("*.json")) == ["new.json", "used.json"]
+
+
+def test_prune_evicts_entries_past_max_age(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    handler = ufh.EnhancedFileHandler(cache_dir=str(cache_dir))
+    handler._cache_put("stale", _result("a"))
+    handler._cache_put("fresh", _result("b"))
+    os.utime(cache_dir / "stale.json", (0, 0))
+    monkeypatch.setattr(ufh, "OCR_CACHE_MAX_AGE", 86400)
+
+    handler._cache_prune()
+
+    assert [p.name for p in cache_dir.glob("*.json")] == ["fresh.json"]
+
+
+def _text_pdf(path, pages):
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    pdf = canvas.Canvas(str(path))
+    for text in pages:
+        pdf.drawString(72, 720, text)
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+def test_many_uses_forkserver_pool_with_marked_workers(tmp_path, monkeypatch):
+    pdf = _text_pdf(tmp_path / "report.pdf", ["quarterly numbers"])
+    csv = tmp_path / "table.csv"
+    csv.write_text("a,b\n1,2\n")
+    handler = ufh.EnhancedFileHandler(cache_dir="")
+    pools = []
+    real_pool = ufh.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        pools.append(kwargs)
+        return real_pool(*args, **kwargs)
+    monkeypatch.setattr(ufh, "ProcessPoolExecutor", recording_pool)
+
+    results = asyncio.run(handler.detect_and_process_many([pdf, str(csv)]))
+
+    assert pools[0]["mp_context"].get_start_method() in ("forkserver", "spawn")
+    assert pools[0]["initializer"] is ocr_module.mark_pool_worker
+    assert "quarterly numbers" in results[0]["processing_result"]["ocr_content"]["text"]
+    assert results[1]["processing_result"]["type"] == "data"
+
+
+def test_pool_worker_parses_pdf_pages_without_nested_pool(tmp_path, monkeypatch):
+    pdf = _text_pdf(tmp_path / "report.pdf", [f"page {i}" for i in range(4)])
+    monkeypatch.setattr(ocr_module, "PARALLEL_PDF_MIN_PAGES", 2)
+    monkeypatch.setattr(ocr_module, "_IN_POOL_WORKER", True)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("nested process pool started inside a pool worker")
+    monkeypatch.setattr(ocr_module, "ProcessPoolExecutor", no_pool)
+
+    assert "page 3" in ocr_service.extract_text(pdf)["text"]
+
+
+def test_pool_worker_never_loads_easyocr(monkeypatch):
+    monkeypatch.setattr(ocr_service, "_easyocr_wanted", True)
+    monkeypatch.setattr(ocr_module, "_IN_POOL_WORKER", True)
+
+    assert ocr_service._get_reader() is None
+    assert ocr_service.engine == "tesseract"
+
+
+def test_many_keeps_easyocr_images_in_process(tmp_path, monkeypatch):
+    images = []
+    for name in ("a.png", "b.png"):
+        (tmp_path / name).write_bytes(b"")
+        images.append(str(tmp_path / name))
+    monkeypatch.setattr(ocr_service, "_reader", object())
+    batched = []
+    monkeypatch.setattr(ocr_service, "batch_extract_images",
+                        lambda paths: batched.extend(paths) or [_result(f"text of {p}") for p in paths])
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("EasyOCR images sent to a process pool")
+    monkeypatch.setattr(ufh, "ProcessPoolExecutor", no_pool)
+
+    results = asyncio.run(ufh.EnhancedFileHandler(cache_dir="").detect_and_process_many(images))
+
+    assert batched == images
+    assert [r["processing_result"]["ocr_content"]["text"] for r in results] == [f"text of {p}" for p in images]
+
+
+@pytest.mark.parametrize("pages, preloaded", [(2, True), (4, False)])
+def test_pdf_bytes_preloaded_only_for_in_process_parse(tmp_path, monkeypatch, pages, preloaded):
+    pdf = _text_pdf(tmp_path / "report.pdf", [f"page {i}" for i in range(pages)])
+    monkeypatch.setattr(ocr_module, "PARALLEL_PDF_MIN_PAGES", 3)
+    seen = []
+    monkeypatch.setattr(ocr_service, "extract_text", lambda path, data=None: seen.append(data) or _result("x"))
+    handler = ufh.EnhancedFileHandler(cache_dir=str(tmp_path / "cache"))
+
+    handler._extract_cached(pdf)
+
+    with open(pdf, "rb") as f:
+        raw = f.read()
+    assert seen == [raw if preloaded else None]
+    # Hashing preloaded bytes and streaming the file give the same key
+    assert handler._cache_key(pdf, raw) == handler._cache_key(pdf)
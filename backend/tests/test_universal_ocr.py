@@ -0,0 +1,281 @@
+"""
+Tests for the universal text extractor
+"""
+
+import threading
+import types
+
+import pytest
+
+from app import universal_ocr as uo
+
+
+def _blank_pdf(path, pages):
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+def test_page_pool_does_not_inherit_held_fitz_lock(tmp_path, monkeypatch):
+    """A large PDF extracted while another thread is inside PyMuPDF must not hang"""
+    path = _blank_pdf(tmp_path / "big.pdf", 10)
+    stub_fitz = types.ModuleType("fitz")
+    stub_fitz.open = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("stub"))
+    monkeypatch.setitem(uo._MODS, "fitz", stub_fitz)
+    monkeypatch.setattr(uo, "_pdf_page_count", lambda file_path: 10)
+    monkeypatch.setattr(uo, "PARALLEL_PDF_MIN_PAGES", 2)
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(uo.universal_ocr._extract_pdf(path)), daemon=True)
+    # Simulate an extract_many thread holding the lock while the page pool starts
+    with uo._FITZ_LOCK:
+        worker.start()
+        worker.join(timeout=60)
+
+    assert not worker.is_alive(), "page pool deadlocked on an inherited _FITZ_LOCK"
+    assert result["method"] == "pdf_no_text"
+
+
+def test_pool_worker_parses_pages_without_nested_pool(tmp_path, monkeypatch):
+    path = _blank_pdf(tmp_path / "big.pdf", 10)
+    monkeypatch.setattr(uo, "PARALLEL_PDF_MIN_PAGES", 2)
+    monkeypatch.setattr(uo, "_IN_POOL_WORKER", True)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("nested process pool started inside a pool worker")
+    monkeypatch.setattr(uo, "ProcessPoolExecutor", no_pool)
+
+    assert uo.universal_ocr._extract_pdf(path)["method"] == "pdf_no_text"
+
+
+@pytest.mark.parametrize("suffix", [".png", ".tiff"])
+def test_16bit_image_is_scaled_not_clipped(tmp_path, suffix):
+    np = pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    ramp = (np.arange(64 * 256, dtype=np.uint32) * 4).reshape(64, 256).astype(np.uint16)
+    path = tmp_path / f"scan{suffix}"
+    Image.fromarray(ramp).save(path)
+
+    with Image.open(path) as img:
+        assert img.mode == "I" or img.mode.startswith("I;16")
+        gray = np.asarray(uo._to_8bit(img).convert("L"))
+
+    assert gray.dtype == np.uint8
+    np.testing.assert_array_equal(gray, (ramp >> 8).astype(np.uint8))
+    # convert('L') alone saturates everything above 255 to white
+    assert (gray < 255).mean() > 0.9
+
+
+@pytest.mark.parametrize("encoding, text", [
+    ("latin-1", "café naïve résumé"),
+    ("latin-1", "Le coeur a ses raisons que la raison ne connaît point. Voilà, à côté du café."),
+    ("cp1252", "Smart “quotes” — café naïve résumé €5"),
+    ("cp1254", "İstanbul'da şehir ağaçları güzeldir. Öğrenci çalışıyor, ışık yanıyor."),
+])
+def test_txt_legacy_encodings_round_trip(tmp_path, encoding, text):
+    pytest.importorskip("charset_normalizer")
+    path = tmp_path / "notes.txt"
+    path.write_bytes(text.encode(encoding))
+
+    result = uo.universal_ocr._extract_txt(str(path))
+
+    assert result["success"]
+    assert result["text"] == text
+
+
+def test_txt_without_charset_normalizer_falls_back_to_latin1(tmp_path, monkeypatch):
+    monkeypatch.setitem(uo._MODS, "charset_normalizer", ImportError("no charset_normalizer"))
+    path = tmp_path / "notes.txt"
+    path.write_bytes("café naïve".encode("latin-1"))
+
+    result = uo.universal_ocr._extract_txt(str(path))
+
+    assert result == {"text": "café naïve", "method": "direct_read_latin-1", "success": True}
+
+
+def _text_pdf(path, pages):
+    """PDF with one line per page; None entries make blank pages"""
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    pdf = canvas.Canvas(str(path))
+    for text in pages:
+        if text:
+            pdf.drawString(72, 720, text)
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+def test_page_ranges_cover_every_page_once():
+    from app.services.ocr_config import page_ranges
+    assert page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert page_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert page_ranges(0, 4) == [(0, 0)]
+
+
+def test_page_range_opens_each_parser_once(tmp_path, monkeypatch):
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    pdfplumber = pytest.importorskip("pdfplumber")
+    pages = [None if i % 4 == 0 else f"page {i}" for i in range(12)]
+    path = _text_pdf(tmp_path / "doc.pdf", pages)
+    monkeypatch.setitem(uo._MODS, "fitz", ImportError("no fitz"))
+    opens = []
+    real_reader, real_open = PyPDF2.PdfReader, pdfplumber.open
+    monkeypatch.setattr(PyPDF2, "PdfReader", lambda *a, **k: opens.append("PyPDF2") or real_reader(*a, **k))
+    monkeypatch.setattr(pdfplumber, "open", lambda *a, **k: opens.append("pdfplumber") or real_open(*a, **k))
+
+    results = uo._extract_pdf_pages(path, 0, len(pages))
+
+    assert sorted(opens) == ["PyPDF2", "pdfplumber"]
+    assert [text.strip() for text, _ in results] == [text or "" for text in pages]
+    assert {method for _, method in results} == {"PyPDF2", "none"}
+
+
+def test_parallel_page_ranges_keep_page_order(tmp_path, monkeypatch):
+    path = _text_pdf(tmp_path / "doc.pdf", [f"page {i}" for i in range(9)])
+    monkeypatch.setattr(uo, "PARALLEL_PDF_MIN_PAGES", 2)
+    monkeypatch.setattr(uo.os, "cpu_count", lambda: 3)
+
+    result = uo.universal_ocr._extract_pdf(path)
+
+    positions = [result["text"].index(f"page {i}\n") for i in range(9)]
+    assert positions == sorted(positions)
+
+
+def test_async_pdf_runs_on_a_thread_not_the_shared_pool(tmp_path, monkeypatch):
+    import asyncio
+    from collections import OrderedDict
+    path = _text_pdf(tmp_path / "doc.pdf", ["hello pdf"])
+    monkeypatch.setattr(uo, "EXTRACT_CACHE", OrderedDict())
+
+    def no_pool():
+        raise AssertionError("PDF sent to the shared process pool")
+    monkeypatch.setattr(uo, "_get_process_pool", no_pool)
+
+    assert "hello pdf" in asyncio.run(uo.universal_ocr.extract_text_async(path))["text"]
+
+
+def test_paddle_model_loads_lazily_and_never_in_pool_workers(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("cv2")
+    loads = []
+
+    class StubPaddle:
+        def __init__(self, **kwargs):
+            loads.append(kwargs)
+
+        def ocr(self, image, cls=True):
+            return [[[None, ("stub text", 0.9)]]]
+
+    monkeypatch.setitem(uo._MODS, "paddleocr", types.SimpleNamespace(PaddleOCR=StubPaddle))
+    monkeypatch.setenv("OCR_BACKEND", "paddle")
+    path = tmp_path / "page.png"
+    Image.new("L", (64, 64), 255).save(path)
+
+    # What a pool worker does when it imports the module
+    monkeypatch.setattr(uo, "_IN_POOL_WORKER", True)
+    in_worker = uo.UniversalOCR()
+    assert in_worker._get_paddle() is None
+    monkeypatch.setattr(uo, "_IN_POOL_WORKER", False)
+
+    ocr = uo.UniversalOCR()
+    assert loads == []
+    assert ocr._extract_image(str(path))["method"] == "paddle_ocr"
+    assert ocr._extract_image(str(path))["text"] == "stub text"
+    assert len(loads) == 1
+
+
+
+def test_extraction_cache_hit_and_ttl(tmp_path, monkeypatch):
+    from collections import OrderedDict
+    monkeypatch.setattr(uo, "EXTRACT_CACHE", OrderedDict())
+    monkeypatch.setattr(uo, "EXTRACT_CACHE_TTL", 60)
+    clock = [1000.0]
+    monkeypatch.setattr(uo, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+    calls = []
+    real_extract = uo.UniversalOCR._extract_uncached
+    monkeypatch.setattr(uo.UniversalOCR, "_extract_uncached",
+                        lambda self, *args: calls.append(args) or real_extract(self, *args))
+    path = tmp_path / "notes.txt"
+    path.write_text("cached text", encoding="utf-8")
+
+    first = uo.universal_ocr.extract_text(str(path))
+    first["text"] = "caller mutation"
+    hit = uo.universal_ocr.extract_text(str(path))
+    assert hit["text"] == "cached text"
+    assert len(calls) == 1
+
+    clock[0] += 61
+    assert uo.universal_ocr.extract_text(str(path))["text"] == "cached text"
+    assert len(calls) == 2
+
+
+def test_failed_extractions_are_not_cached(tmp_path, monkeypatch):
+    from collections import OrderedDict
+    monkeypatch.setattr(uo, "EXTRACT_CACHE", OrderedDict())
+    path = tmp_path / "broken.docx"
+    path.write_bytes(b"not a zip")
+
+    assert not uo.universal_ocr.extract_text(str(path))["success"]
+    assert len(uo.EXTRACT_CACHE) == 0
+
+
+def test_docx_cell_text_matches_python_docx(tmp_path):
+    docx = pytest.importorskip("docx")
+    doc = docx.Document()
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "plain"
+    first = table.cell(0, 1)
+    first.text = "first paragraph"
+    first.add_paragraph("second\tparagraph")
+    run = table.cell(1, 0).paragraphs[0].add_run("line one")
+    run.add_break()
+    run.add_text("line two")
+    doc.save(tmp_path / "table.docx")
+
+    loaded = docx.Document(tmp_path / "table.docx").tables[0]
+    for row in loaded.rows:
+        for cell in row.cells:
+            assert uo._docx_cell_text(cell._tc) == cell.text
+
+
+def test_streaming_describe_matches_pandas():
+    np = pytest.importorskip("numpy")
+    pd = pytest.importorskip("pandas")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.normal(50, 10, 5000), "b": rng.integers(0, 100, 5000).astype(float)})
+    df.loc[::7, "a"] = np.nan
+
+    stats = uo._StreamingDescribe(2)
+    # Uneven chunks exercise the pairwise (Chan) merge
+    for start, stop in [(0, 1), (1, 1234), (1234, 1234), (1234, 5000)]:
+        chunk = df.iloc[start:stop]
+        stats.update([chunk["a"].to_numpy(), chunk["b"].to_numpy()])
+
+    pd.testing.assert_frame_equal(stats.result(["a", "b"]), df.describe())
+
+
+def test_streaming_describe_all_missing_column():
+    np = pytest.importorskip("numpy")
+    stats = uo._StreamingDescribe(1)
+    stats.update([np.array([np.nan, np.nan])])
+
+    result = stats.result(["empty"])["empty"]
+    assert result["count"] == 0
+    assert result.drop("count").isna().all()
+
+
+def test_csv_summary_stats_match_pandas(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"x": range(1000), "y": [i * 0.5 for i in range(1000)], "name": ["n"] * 1000}).to_csv(path, index=False)
+
+    n_rows, columns, head, stats = uo.universal_ocr._load_csv_summary(str(path))
+
+    expected = pd.read_csv(path)
+    assert (n_rows, columns) == (1000, ["x", "y", "name"])
+    pd.testing.assert_frame_equal(stats, expected.describe(), check_dtype=False)
\ No newline at end of file